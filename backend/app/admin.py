@@ -7,9 +7,36 @@ from database import engine
 from fastapi import FastAPI, Depends
 from utils.auth import get_current_user
 from auth_admin import AdminAuth
+from utils.cache import invalidate_responses
+from utils.auth import invalidate_user
 from typing import Optional
 
-class UserAdmin(ModelView, model=User):
+class InvalidateResponsesMixin:
+    """
+    Сбрасывает кэш публичных ответов после изменений через админ-панель
+    """
+
+    async def after_model_change(self, data, model, is_created, request) -> None:
+        invalidate_responses()
+
+    async def after_model_delete(self, model, request) -> None:
+        invalidate_responses()
+
+class InvalidateUsersMixin(InvalidateResponsesMixin):
+    """
+    Дополнительно очищает кэш пользователей: прежний email
+    измененной записи здесь неизвестен
+    """
+
+    async def after_model_change(self, data, model, is_created, request) -> None:
+        await super().after_model_change(data, model, is_created, request)
+        invalidate_user()
+
+    async def after_model_delete(self, model, request) -> None:
+        await super().after_model_delete(model, request)
+        invalidate_user()
+
+class UserAdmin(InvalidateUsersMixin, ModelView, model=User):
     name = "Пользователь"
     name_plural = "Пользователи"
     icon = "fa-solid fa-user"
@@ -22,7 +49,7 @@ class UserAdmin(ModelView, model=User):
     can_delete = True
     can_view_details = True
 
-class EventAdmin(ModelView, model=Event):
+class EventAdmin(InvalidateResponsesMixin, ModelView, model=Event):
     name = "Мероприятие"
     name_plural = "Мероприятия"
     icon = "fa-solid fa-calendar"
@@ -35,7 +62,7 @@ class EventAdmin(ModelView, model=Event):
     can_delete = True
     can_view_details = True
 
-class CategoryAdmin(ModelView, model=Category):
+class CategoryAdmin(InvalidateResponsesMixin, ModelView, model=Category):
     name = "Категория"
     name_plural = "Категории"
     icon = "fa-solid fa-tag"
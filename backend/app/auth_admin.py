@@ -1,15 +1,17 @@
 from sqladmin.authentication import AuthenticationBackend
 from fastapi import Request
 from fastapi.responses import RedirectResponse
-from utils.auth import verify_token, create_access_token
+from utils.auth import verify_token, create_access_token, decode_token, revoke_token
+from utils.revocation import revoke_claims
+from services.user_service import check_password
+from utils.ratelimit import check_login_attempt, get_client_ip
 from models.models import User, UserRole
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import engine
 from sqlalchemy import select
-import logging
+from utils.log import get_logger
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 class AdminAuth(AuthenticationBackend):
     async def login(self, request: Request) -> bool:
@@ -18,10 +20,17 @@ class AdminAuth(AuthenticationBackend):
             email = form.get("username")
             password = form.get("password")
             
-            logger.info(f"Login attempt for email: {email}")
+            logger.info("Admin login attempt for %s", email)
             
             if not email or not password:
-                logger.error("Missing email or password")
+                logger.info("Admin login failed: missing email or password")
+                return False
+            
+            # Ограничение попыток проверяется до обращения к базе и bcrypt;
+            # sqladmin ожидает от login() только True/False
+            client_ip = get_client_ip(request)
+            if check_login_attempt(client_ip, email):
+                logger.info("Admin login throttled for %s from %s", email, client_ip)
                 return False
             
             async with AsyncSession(engine) as session:
@@ -31,27 +40,32 @@ class AdminAuth(AuthenticationBackend):
                 user = result.scalar_one_or_none()
                 
                 if not user:
-                    logger.error(f"User not found: {email}")
+                    logger.info("Admin login failed: unknown user %s", email)
                     return False
                     
-                if not user.verify_password(password):
-                    logger.error(f"Invalid password for user: {email}")
+                if not await check_password(session, user, password):
+                    logger.info("Admin login failed: wrong password for %s", email)
                     return False
                     
                 if user.role != UserRole.ADMIN:
-                    logger.error(f"User is not admin: {email}")
+                    logger.warning("Admin login denied: %s is not an admin", email)
                     return False
                     
                 token = create_access_token({"sub": user.email})
                 request.session.update({"token": token})
-                logger.info(f"Successful login for admin: {email}")
+                logger.info("Admin login succeeded for %s", email)
                 return True
                 
-        except Exception as e:
-            logger.error(f"Login error: {str(e)}")
+        except Exception:
+            logger.exception("Admin login error")
             return False
 
     async def logout(self, request: Request) -> bool:
+        token = request.session.get("token")
+        if token:
+            async with AsyncSession(engine) as session:
+                await revoke_claims(session, decode_token(token))
+            revoke_token(token)
         request.session.clear()
         return True
 
@@ -62,9 +76,9 @@ class AdminAuth(AuthenticationBackend):
             return False
             
         try:
-            async with AsyncSession(engine) as session:
-                user = await verify_token(token, session)
-                return user is not None and user.role == UserRole.ADMIN
-        except Exception as e:
-            logger.error(f"Authentication error: {str(e)}")
+            # Сессия открывается только при промахе кэша пользователей
+            user = await verify_token(token)
+            return user is not None and user.role == UserRole.ADMIN
+        except Exception:
+            logger.exception("Admin authentication error")
             return False 
\ No newline at end of file
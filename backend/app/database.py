@@ -1,18 +1,202 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine, AsyncConnection
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Any, Dict, List
 import os
+from utils.sql_metrics import instrument_engine
+
+def normalize_database_url(url: str) -> str:
+    """
+    Хостинги (Render, Heroku) выдают postgres://...; приложению нужен
+    асинхронный драйвер asyncpg
+    """
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
 
 # Используем переменную окружения для пути к базе данных или значение по умолчанию
-DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite+aiosqlite:///./events.db')
+DATABASE_URL = normalize_database_url(os.environ.get('DATABASE_URL', 'sqlite+aiosqlite:///./events.db'))
 
-engine = create_async_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Параметры пула для серверных СУБД (PostgreSQL); для файловой SQLite
+# используются только размер пула и переполнение
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+# Профиль SQLite, применяемый к каждому новому соединению.
+# Любой параметр переопределяется переменной SQLITE_<ИМЯ> (например,
+# SQLITE_SYNCHRONOUS=FULL); пустое значение отключает PRAGMA.
+#   journal_mode=WAL      — читатели не блокируют писателя и наоборот
+#   synchronous=NORMAL    — в режиме WAL fsync только при checkpoint
+#   cache_size=-65536     — 64 МБ страничного кэша на соединение
+#   mmap_size=268435456   — чтение файла базы через mmap (256 МБ)
+#   temp_store=MEMORY     — временные таблицы и сортировки в памяти
+#   busy_timeout=5000     — ожидание блокировки вместо «database is locked»
+#   foreign_keys=ON       — проверка внешних ключей
+SQLITE_PRAGMA_DEFAULTS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": "-65536",
+    "mmap_size": "268435456",
+    "temp_store": "MEMORY",
+    "busy_timeout": "5000",
+    "foreign_keys": "ON",
+}
+
+SQLITE_PRAGMAS = {
+    name: os.environ.get(f"SQLITE_{name.upper()}", default)
+    for name, default in SQLITE_PRAGMA_DEFAULTS.items()
+}
+
+def apply_sqlite_pragmas(engine: AsyncEngine, pragmas: Dict[str, str] = SQLITE_PRAGMAS) -> None:
+    """
+    Подключает выполнение PRAGMA при открытии каждого соединения пула
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if value:
+                cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+async def read_sqlite_pragmas(conn: AsyncConnection) -> Dict[str, str]:
+    """
+    Действующие значения PRAGMA профиля (для отчета при старте)
+    """
+    if conn.dialect.name != "sqlite":
+        return {}
+    return {
+        name: (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+        for name in SQLITE_PRAGMA_DEFAULTS
+    }
+
+def apply_read_only(engine: AsyncEngine) -> None:
+    """
+    Переводит соединения PostgreSQL в режим только для чтения
+    (для SQLite то же делает PRAGMA query_only)
+    """
+    if engine.dialect.name != "postgresql":
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_read_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+        cursor.close()
+
+def make_engine(url: str, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW) -> AsyncEngine:
+    """
+    Создает движок с параметрами под конкретную СУБД: check_same_thread
+    передается только SQLite, pre-ping и recycle — только серверным базам
+    """
+    database_url = make_url(url)
+    kwargs = {}
+    if database_url.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+        # База в памяти живет в единственном соединении (StaticPool);
+        # для файла aiosqlite по умолчанию выбирает NullPool, поэтому пул задаем явно
+        if database_url.database not in (None, "", ":memory:"):
+            kwargs.update(
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=DB_POOL_TIMEOUT,
+            )
+    else:
+        kwargs.update(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    return create_async_engine(url, **kwargs)
+
+# Метрики пулов соединений: счетчики событий пула по каждому движку
+_pools: Dict[str, tuple] = {}
+
+def track_pool(name: str, engine: AsyncEngine) -> None:
+    counters = {"connects": 0, "checkouts": 0, "checkins": 0, "peak_checked_out": 0}
+    _pools[name] = (engine, counters)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        counters["connects"] += 1
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters["checkouts"] += 1
+        checked_out = counters["checkouts"] - counters["checkins"]
+        counters["peak_checked_out"] = max(counters["peak_checked_out"], checked_out)
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        counters["checkins"] += 1
+
+def pool_stats() -> List[Dict[str, Any]]:
+    """
+    Состояние пулов: размер, занятые соединения, переполнение, счетчики
+    и насыщение — доля занятых соединений от предела пула с переполнением
+    """
+    stats = []
+    for name, (pool_engine, counters) in _pools.items():
+        pool = pool_engine.sync_engine.pool
+        data = {
+            "name": name,
+            "backend": pool_engine.dialect.name,
+            "pool": type(pool).__name__,
+            "status": pool.status(),
+        }
+        for metric in ("size", "checkedout", "overflow", "checkedin"):
+            if hasattr(pool, metric):
+                data[metric] = getattr(pool, metric)()
+        # У QueuePool нет публичного доступа к max_overflow; -1 — без ограничения
+        max_overflow = getattr(pool, "_max_overflow", None)
+        if "size" in data and max_overflow is not None and max_overflow >= 0:
+            limit = data["size"] + max_overflow
+            data["max_overflow"] = max_overflow
+            data["saturation"] = round(data["checkedout"] / limit, 3)
+            data["peak_saturation"] = round(counters["peak_checked_out"] / limit, 3)
+        data.update(counters)
+        stats.append(data)
+    return stats
+
+engine = make_engine(DATABASE_URL)
+apply_sqlite_pragmas(engine)
+track_pool("write", engine)
+instrument_engine(engine)
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Отдельный пул только для чтения (GET-запросы). В SQLite соединения
+# открываются с query_only=ON: в режиме WAL читатели не ждут писателя
+# и не занимают соединения основного пула. READ_DATABASE_URL позволяет
+# направить чтение на реплику.
+READ_DATABASE_URL = normalize_database_url(os.environ.get('READ_DATABASE_URL', DATABASE_URL))
+READ_POOL_SIZE = int(os.environ.get('READ_POOL_SIZE', '10'))
+READ_MAX_OVERFLOW = int(os.environ.get('READ_MAX_OVERFLOW', '10'))
+
+read_engine = make_engine(READ_DATABASE_URL, pool_size=READ_POOL_SIZE, max_overflow=READ_MAX_OVERFLOW)
+apply_sqlite_pragmas(read_engine, {**SQLITE_PRAGMAS, "query_only": "ON"})
+apply_read_only(read_engine)
+track_pool("read", read_engine)
+instrument_engine(read_engine)
+
+ReadSessionLocal = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+)
+
 Base = declarative_base()
 
 async def get_db():
@@ -20,4 +204,14 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
+
+async def get_read_db():
+    """
+    Сессия пула только для чтения; любая запись в ней завершится ошибкой
+    """
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
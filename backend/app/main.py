@@ -1,18 +1,34 @@
-from fastapi import FastAPI, Depends, HTTPException, status, APIRouter
+from fastapi import FastAPI, Depends, HTTPException, status, APIRouter, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+import asyncio
 import os
+import time
 from pathlib import Path
 from routers import auth, events, users, calendar, admin, event_creation, categories
-from database import engine, Base
+from routers.admin import get_admin_user
+from database import engine, read_engine, read_sqlite_pragmas, pool_stats
+from services.event_search import detect_event_search
+from services.schema_migrations import run_migrations, LATEST_VERSION
+from services.participant_counters import reconcile_periodically
+from services.event_archive import archive_periodically, ARCHIVE_INTERVAL
+from utils.cache import cache_stats
+from utils.password import password_pool_stats, calibrate_password_cost
+from utils.ratelimit import limiter_stats
+from utils.revocation import denylist, load_revoked_tokens, sync_revoked_periodically
+from utils.log import configure_logging, shutdown_logging, start_request
+from utils.sql_metrics import start_sql_stats, perf_registry, route_name, server_timing, N_PLUS_ONE_THRESHOLD
+from services.event_serializer import event_to_dict, JSONBytesResponse
 from sqladmin import Admin
 from admin import UserAdmin, EventAdmin, CategoryAdmin
 from models import models
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from sqlalchemy import text, inspect, select, func
 from datetime import datetime
 
+configure_logging()
+
 app = FastAPI(title="EventHub API")
 
 # Настройка CORS
@@ -36,6 +52,20 @@ app.add_middleware(
     max_age=3600
 )
 
+# Идентификатор запроса для логов: берем из X-Request-ID или генерируем
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    request_id = start_request(request.headers.get("X-Request-ID"))
+    sql_stats = start_sql_stats()
+    started_at = time.perf_counter()
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    response.headers["Server-Timing"] = server_timing(sql_stats, time.perf_counter() - started_at)
+    # scope["route"] заполняет роутер FastAPI при сопоставлении маршрута
+    if sql_stats.queries:
+        perf_registry.add(route_name(request.scope), sql_stats)
+    return response
+
 # Получаем абсолютный путь к директории приложения
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -72,10 +102,12 @@ app.include_router(auth.router, prefix="/api")
 print("✓ Auth router registered")
 app.include_router(events.router, prefix="/api/events")
 print("✓ Events router registered")
-app.include_router(users.router, prefix="/api")
-print("✓ Users router registered")
+# Календарь регистрируется раньше пользователей: иначе /api/calendar
+# перехватывает маршрут пользователей /api/{user_id}
 app.include_router(calendar.router, prefix="/api")
 print("✓ Calendar router registered")
+app.include_router(users.router, prefix="/api")
+print("✓ Users router registered")
 app.include_router(admin.router, prefix="/api/admin")
 print("✓ Admin router registered")
 app.include_router(categories.router, prefix="/api/categories")
@@ -127,6 +159,8 @@ async def direct_categories():
     except Exception as e:
         return {"error": str(e), "categories": []}
 
+DIRECT_EVENT_FIELDS = frozenset({"id", "title", "short_description", "location", "start_date", "status"})
+
 @app.get("/api/direct-events")
 async def direct_events():
     try:
@@ -141,21 +175,76 @@ async def direct_events():
             result = await session.execute(query)
             events = result.scalars().all()
             
-            events_list = []
-            for event in events:
-                events_list.append({
-                    "id": event.id,
-                    "title": event.title,
-                    "short_description": event.short_description,
-                    "location": event.location,
-                    "start_date": event.start_date.isoformat() if event.start_date else None,
-                    "status": event.status.value if event.status else None
-                })
+            events_list = [event_to_dict(event, fields=DIRECT_EVENT_FIELDS) for event in events]
             
-            return {"events": events_list, "count": len(events_list)}
+            return JSONBytesResponse({"events": events_list, "count": len(events_list)})
     except Exception as e:
         return {"error": str(e), "events": []}
 
+# Метрики внутрипроцессных кэшей
+@app.get("/debug/cache")
+async def debug_cache(current_user: models.User = Depends(get_admin_user)):
+    return {"caches": cache_stats()}
+
+# Метрики пула хеширования паролей
+@app.get("/debug/password-pool")
+async def debug_password_pool(current_user: models.User = Depends(get_admin_user)):
+    return password_pool_stats()
+
+# Состояние базы данных: таблицы и число записей
+@app.get("/debug/db")
+async def debug_database():
+    try:
+        async with engine.connect() as conn:
+            # Список таблиц через инспектор SQLAlchemy (работает с любой СУБД)
+            tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+            
+            # Проверяем количество записей в основных таблицах
+            counts = {}
+            for name, model in (("events", models.Event), ("categories", models.Category), ("users", models.User)):
+                counts[name] = (await conn.execute(select(func.count()).select_from(model))).scalar()
+            
+            return {
+                "tables": tables,
+                "events_count": counts["events"],
+                "categories_count": counts["categories"],
+                "users_count": counts["users"],
+                "database_url": engine.url.render_as_string(hide_password=True),
+                "backend": engine.dialect.name
+            }
+    except Exception as e:
+        return {"error": str(e)}
+
+# Пулы соединений: основной и только для чтения
+@app.get("/debug/db-pools")
+async def debug_db_pools(current_user: models.User = Depends(get_admin_user)):
+    return {"pools": pool_stats()}
+
+# Состояние ограничителей попыток входа
+@app.get("/debug/rate-limits")
+async def debug_rate_limits(current_user: models.User = Depends(get_admin_user)):
+    return {"limiters": limiter_stats()}
+
+# Черный список отозванных токенов
+@app.get("/debug/revocation")
+async def debug_revocation(current_user: models.User = Depends(get_admin_user)):
+    return denylist.stats()
+
+@app.get("/debug/perf")
+async def debug_perf(reset: bool = False, current_user: models.User = Depends(get_admin_user)):
+    """
+    SQL-нагрузка по маршрутам: среднее число запросов и время в базе,
+    повторяющиеся запросы (признак N+1) и самые медленные запросы
+    """
+    routes = perf_registry.summary()
+    if reset:
+        perf_registry.clear()
+    return {
+        "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+        "suspected_n_plus_one": [item["route"] for item in routes if item["n_plus_one"]],
+        "routes": routes,
+    }
+
 # Настройка админ-панели
 admin = Admin(app, engine)
 admin.add_view(UserAdmin)
@@ -170,13 +259,43 @@ app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 FRONTEND_DIR = BASE_DIR.parent / "frontend"
 app.mount("/", StaticFiles(directory=str(FRONTEND_DIR), html=True), name="frontend")
 
+# Фоновые задачи, запущенные при старте; отменяются при остановке
+background_tasks = []
+
 @app.on_event("startup")
 async def startup():
     try:
         print("Starting application...")
+        # Стоимость bcrypt под текущее железо, до первых хеширований
+        policy = await calibrate_password_cost()
+        print(f"Password hash cost: {policy['rounds']} rounds (base {policy['base_ms']} ms)")
+
+        # Миграции схемы; при актуальной версии схема не проверяется
+        applied = await run_migrations(engine)
+        if applied:
+            print(f"Applied migrations: {', '.join(applied)}")
+        else:
+            print(f"Database schema is up to date (version {LATEST_VERSION})")
+
+        async with engine.connect() as conn:
+            pragmas = await read_sqlite_pragmas(conn)
+        if pragmas:
+            print("SQLite pragmas: " + ", ".join(f"{name}={value}" for name, value in pragmas.items()))
+
+        async with engine.connect() as conn:
+            if await detect_event_search(conn):
+                print("Full-text search index is ready")
+
         async with engine.begin() as conn:
-            await conn.run_sync(models.Base.metadata.create_all)
-        print("Database tables created successfully")
+            print(f"Revoked tokens loaded: {await load_revoked_tokens(conn)}")
+
+        # Отзывы токенов, записанные другими воркерами
+        background_tasks.append(asyncio.create_task(sync_revoked_periodically(engine)))
+        # Периодическая сверка счетчиков участников с event_participants
+        background_tasks.append(asyncio.create_task(reconcile_periodically(engine)))
+        # Перенос завершившихся мероприятий в архив
+        if ARCHIVE_INTERVAL > 0:
+            background_tasks.append(asyncio.create_task(archive_periodically(engine)))
         
         # Инициализируем базу данных тестовыми данными
         try:
@@ -197,7 +316,7 @@ async def initialize_database():
     try:
         from sqlalchemy.orm import sessionmaker
         from models.models import Category, User, Event, EventStatus, EventType, UserRole
-        from utils.password import get_password_hash
+        from utils.password import get_password_hash_async
         from datetime import datetime, timedelta
         
         async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
@@ -231,7 +350,7 @@ async def initialize_database():
                     email="organizer@test.com",
                     username="test_organizer",
                     full_name="Test Organizer",
-                    hashed_password=get_password_hash("password123"),
+                    hashed_password=await get_password_hash_async("password123"),
                     role=UserRole.ORGANIZER
                 )
                 session.add(organizer)
@@ -241,7 +360,7 @@ async def initialize_database():
                     email="admin@test.com",
                     username="test_admin",
                     full_name="Test Admin",
-                    hashed_password=get_password_hash("password123"),
+                    hashed_password=await get_password_hash_async("password123"),
                     role=UserRole.ADMIN
                 )
                 session.add(admin)
@@ -282,10 +401,14 @@ async def initialize_database():
 # Корректное завершение работы
 @app.on_event("shutdown")
 async def shutdown():
+    for task in background_tasks:
+        task.cancel()
     try:
         await engine.dispose()
+        await read_engine.dispose()
     except Exception as e:
         print(f"Error during shutdown: {e}")
+    shutdown_logging()
 
 # Тестовый эндпоинт для проверки работы сервера
 @app.get("/test")
@@ -319,35 +442,6 @@ async def debug_routes():
             })
     return {"routes": routes}
 
-# Отладочный эндпоинт для проверки базы данных
-@app.get("/debug/db")
-async def debug_database():
-    try:
-        async with engine.begin() as conn:
-            # Проверяем таблицы
-            result = await conn.execute(text("SELECT name FROM sqlite_master WHERE type='table';"))
-            tables = result.fetchall()
-            
-            # Проверяем количество записей в основных таблицах
-            events_count = await conn.execute(text("SELECT COUNT(*) FROM events;"))
-            events_count = events_count.scalar()
-            
-            categories_count = await conn.execute(text("SELECT COUNT(*) FROM categories;"))
-            categories_count = categories_count.scalar()
-            
-            users_count = await conn.execute(text("SELECT COUNT(*) FROM users;"))
-            users_count = users_count.scalar()
-            
-            return {
-                "tables": [table[0] for table in tables],
-                "events_count": events_count,
-                "categories_count": categories_count,
-                "users_count": users_count,
-                "database_url": str(engine.url)
-            }
-    except Exception as e:
-        return {"error": str(e)}
-
 # Обработчик для favicon
 @app.get("/favicon.ico")
 async def favicon():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Boolean, Enum, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Boolean, Enum, Text, Float, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -12,7 +12,12 @@ event_participants = Table(
     Column('user_id', Integer, ForeignKey('users.id')),
     Column('event_id', Integer, ForeignKey('events.id')),
     Column('ticket_purchased', Boolean, default=False),
-    Column('created_at', DateTime, default=datetime.utcnow)
+    Column('created_at', DateTime, default=datetime.utcnow),
+    # Пользователь может участвовать в мероприятии только один раз;
+    # индекс также обслуживает выборку участников по event_id
+    Index('uq_event_participants_event_user', 'event_id', 'user_id', unique=True),
+    # Мероприятия пользователя (/users/me/events и т.п.)
+    Index('ix_event_participants_user_event', 'user_id', 'event_id')
 )
 
 class UserRole(enum.Enum):
@@ -55,6 +60,25 @@ class User(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Ключ курсорной пагинации списка мероприятий
+        Index("ix_events_start_date_id", "start_date", "id"),
+        # Фильтр по диапазону дат: end_date >= начало и start_date <= конец
+        Index("ix_events_end_date_start_date", "end_date", "start_date"),
+        # Фильтры по статусу с сортировкой по дате
+        Index("ix_events_status_start_date", "status", "start_date"),
+        # Одобренные мероприятия по дате (публичный список и календарь)
+        Index(
+            "ix_events_approved_start_date",
+            "start_date", "id",
+            sqlite_where=text("status = 'APPROVED'"),
+            postgresql_where=text("status = 'APPROVED'")
+        ),
+        # Мероприятия организатора
+        Index("ix_events_organizer_id_start_date", "organizer_id", "start_date"),
+        # id перенесенных в архив мероприятий не выдаются повторно
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -97,9 +121,11 @@ class Category(Base):
 
 class EventImage(Base):
     __tablename__ = "event_images"
+    # id перенесенных в архив изображений не выдаются повторно
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(Integer, ForeignKey("events.id"))
+    event_id = Column(Integer, ForeignKey("events.id"), index=True)
     image_url = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -110,5 +136,94 @@ event_categories = Table(
     'event_categories',
     Base.metadata,
     Column('event_id', Integer, ForeignKey('events.id')),
-    Column('category_id', Integer, ForeignKey('categories.id'))
-) 
\ No newline at end of file
+    Column('category_id', Integer, ForeignKey('categories.id')),
+    # Выборка категорий мероприятия (selectinload) и мероприятий категории
+    Index('ix_event_categories_event_category', 'event_id', 'category_id'),
+    Index('ix_event_categories_category_event', 'category_id', 'event_id')
+)
+
+
+class RevokedToken(Base):
+    """
+    Отозванные токены (выход из системы, ротация refresh-токенов).
+    Хранятся до истечения срока действия токена, затем удаляются.
+    """
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+# Архив завершившихся мероприятий (services/event_archive.py).
+# Строки переносятся из events, event_participants, event_categories и
+# event_images с прежними id, поэтому горячие таблицы содержат только
+# актуальные мероприятия. Ссылок на users и categories через внешние ключи
+# нет: удаление пользователя или категории не должно упираться в архив.
+archived_event_participants = Table(
+    'archived_event_participants',
+    Base.metadata,
+    Column('user_id', Integer),
+    Column('event_id', Integer, ForeignKey('archived_events.id')),
+    Column('ticket_purchased', Boolean, default=False),
+    Column('created_at', DateTime, default=datetime.utcnow),
+    Index('ix_archived_event_participants_event_user', 'event_id', 'user_id'),
+    Index('ix_archived_event_participants_user_event', 'user_id', 'event_id')
+)
+
+archived_event_categories = Table(
+    'archived_event_categories',
+    Base.metadata,
+    Column('event_id', Integer, ForeignKey('archived_events.id')),
+    Column('category_id', Integer),
+    Index('ix_archived_event_categories_event_category', 'event_id', 'category_id')
+)
+
+class ArchivedEvent(Base):
+    """
+    Мероприятие из архива; поля совпадают с Event, поэтому сериализуется
+    теми же функциями (event_to_dict, EventResponse)
+    """
+    __tablename__ = "archived_events"
+    __table_args__ = (
+        Index("ix_archived_events_start_date_id", "start_date", "id"),
+        Index("ix_archived_events_organizer_id_start_date", "organizer_id", "start_date"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String)
+    short_description = Column(String)
+    full_description = Column(Text)
+    location = Column(String)
+    start_date = Column(DateTime)
+    end_date = Column(DateTime)
+    created_at = Column(DateTime)
+    max_participants = Column(Integer)
+    current_participants = Column(Integer, default=0)
+    image_url = Column(String)
+    event_type = Column(Enum(EventType), default=EventType.FREE)
+    ticket_price = Column(Float, nullable=True)
+    status = Column(Enum(EventStatus), default=EventStatus.PENDING)
+    rejection_reason = Column(String, nullable=True)
+    organizer_id = Column(Integer)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+    organizer = relationship(
+        "User",
+        primaryjoin="foreign(ArchivedEvent.organizer_id) == User.id",
+        viewonly=True
+    )
+    categories = relationship(
+        "Category",
+        secondary=archived_event_categories,
+        primaryjoin="ArchivedEvent.id == archived_event_categories.c.event_id",
+        secondaryjoin="foreign(archived_event_categories.c.category_id) == Category.id",
+        viewonly=True
+    )
+    images = relationship("ArchivedEventImage", viewonly=True)
+
+class ArchivedEventImage(Base):
+    __tablename__ = "archived_event_images"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    event_id = Column(Integer, ForeignKey("archived_events.id"), index=True)
+    image_url = Column(String)
+    created_at = Column(DateTime)
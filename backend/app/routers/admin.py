@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload, joinedload
-from typing import List
-from database import get_db
+from typing import List, Optional
+import io
+from database import get_db, engine
 from models import models
 from schemas import schemas
-from utils.auth import get_current_user
+from utils.auth import get_current_user, invalidate_user
+from utils.cache import invalidate_responses
+from utils.streaming import wants_ndjson, ndjson_response
+from services.event_serializer import EVENT_FIELDS, event_to_dict
+from services.event_import import EventImporter, FORMATS, detect_format, read_rows
+from utils.log import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter(
     tags=["admin"]
@@ -20,58 +28,39 @@ def get_admin_user(current_user: models.User = Depends(get_current_user)):
         )
     return current_user
 
+# В админ-панели участники не выводятся, а полное описание дублируется
+# в поле description, которое использует admin.js
+ADMIN_EVENT_FIELDS = EVENT_FIELDS - {"participants"}
+
+def admin_event_dict(event: models.Event) -> dict:
+    """Словарь мероприятия для админ-панели"""
+    data = event_to_dict(event, fields=ADMIN_EVENT_FIELDS)
+    data["description"] = event.full_description
+    return data
+
+async def serialize_admin_events(db: AsyncSession, events: list) -> List[dict]:
+    return [admin_event_dict(event) for event in events]
+
 @router.get("/events", response_model=List[schemas.EventResponse])
 async def get_events(
+    request: Request,
+    stream: bool = Query(False, description="Stream events as NDJSON (same as Accept: application/x-ndjson)"),
     db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_admin_user)
 ):
     """Получение списка всех мероприятий"""
-    events = await db.execute(select(models.Event).options(
+    query = select(models.Event).options(
         joinedload(models.Event.organizer),
         selectinload(models.Event.images),
         selectinload(models.Event.categories)
-    ))
+    )
+    if wants_ndjson(request, stream):
+        return ndjson_response(query.order_by(models.Event.id), serialize_admin_events)
+
+    events = await db.execute(query)
     events = events.unique().scalars().all()
     
-    events_data = []
-    for event in events:
-        event_dict = {
-            "id": event.id,
-            "title": event.title,
-            "description": event.full_description,
-            "short_description": event.short_description,
-            "start_date": event.start_date.isoformat() if event.start_date else None,
-            "end_date": event.end_date.isoformat() if event.end_date else None,
-            "location": event.location,
-            "max_participants": event.max_participants,
-            "current_participants": event.current_participants,
-            "status": event.status.value if event.status else None,
-            "event_type": event.event_type.value if event.event_type else None,
-            "organizer_id": event.organizer_id,
-            "organizer": {
-                "id": event.organizer.id,
-                "username": event.organizer.username,
-                "email": event.organizer.email,
-                "full_name": event.organizer.full_name
-            } if event.organizer else None,
-            "categories": [
-                {
-                    "id": cat.id,
-                    "name": cat.name,
-                    "description": cat.description
-                } for cat in event.categories
-            ] if event.categories else [],
-            "images": [
-                {
-                    "id": img.id,
-                    "image_url": img.image_url,
-                    "created_at": img.created_at.isoformat() if img.created_at else None
-                } for img in event.images
-            ] if event.images else []
-        }
-        events_data.append(event_dict)
-    
-    return events_data
+    return [admin_event_dict(event) for event in events]
 
 @router.post("/events/{event_id}/approve")
 async def approve_event(
@@ -94,6 +83,7 @@ async def approve_event(
     
     event.status = models.EventStatus.APPROVED
     await db.commit()
+    invalidate_responses()
     await db.refresh(event)
     
     return {"message": "Event approved successfully"}
@@ -121,6 +111,7 @@ async def reject_event(
     # Удаляем мероприятие из базы данных
     await db.delete(event)
     await db.commit()
+    invalidate_responses()
     
     return {"message": "Event rejected and deleted successfully"}
 
@@ -145,6 +136,7 @@ async def delete_event(
     
     await db.delete(event)
     await db.commit()
+    invalidate_responses()
     
     return {"message": "Event deleted successfully"}
 
@@ -170,6 +162,8 @@ def update_user_role(
     
     user.role = role
     db.commit()
+    invalidate_responses()
+    invalidate_user(user.email)
     db.refresh(user)
     return user
 
@@ -196,55 +190,7 @@ async def get_event(
             detail="Мероприятие не найдено"
         )
     
-    # Безопасная сериализация связанных объектов
-    organizer = None
-    if event.organizer is not None:
-        organizer = {
-            "id": event.organizer.id,
-            "username": event.organizer.username,
-            "email": event.organizer.email,
-            "full_name": event.organizer.full_name,
-            "role": event.organizer.role.value if event.organizer.role else None
-        }
-    images = []
-    if hasattr(event, 'images') and event.images:
-        for image in event.images:
-            images.append({
-                "id": image.id,
-                "event_id": image.event_id,
-                "image_url": getattr(image, 'url', None),
-                "created_at": image.created_at.isoformat() if image.created_at else None
-            })
-    categories = []
-    if hasattr(event, 'categories') and event.categories:
-        for category in event.categories:
-            categories.append({
-                "id": category.id,
-                "name": category.name,
-                "description": category.description
-            })
-    event_dict = {
-        "id": event.id,
-        "title": event.title,
-        "short_description": event.short_description,
-        "full_description": event.full_description,
-        "start_date": event.start_date.isoformat() if event.start_date else None,
-        "end_date": event.end_date.isoformat() if event.end_date else None,
-        "location": event.location,
-        "max_participants": event.max_participants,
-        "current_participants": event.current_participants,
-        "status": event.status,
-        "event_type": event.event_type,
-        "created_at": event.created_at.isoformat() if event.created_at else None,
-        "rejection_reason": event.rejection_reason,
-        "organizer_id": event.organizer_id,
-        "image_url": getattr(event, 'image_url', None),
-        "organizer": organizer,
-        "images": images,
-        "categories": categories
-    }
-    
-    return event_dict
+    return admin_event_dict(event)
 
 @router.delete("/events/published", response_model=dict)
 async def delete_published_events(
@@ -263,6 +209,7 @@ async def delete_published_events(
             await db.delete(event)
         
         await db.commit()
+        invalidate_responses()
         
         return {
             "message": f"Успешно удалено {len(events)} опубликованных мероприятий",
@@ -273,4 +220,49 @@ async def delete_published_events(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при удалении мероприятий: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+@router.post("/import/events")
+async def import_events(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv или ndjson; по умолчанию по расширению файла"),
+    event_status: models.EventStatus = Query(models.EventStatus.PENDING, alias="status"),
+    create_categories: bool = Query(False, description="Создавать категории, которых нет в базе"),
+    dry_run: bool = Query(False, description="Только проверить строки, ничего не записывая"),
+    current_user: models.User = Depends(get_admin_user)
+):
+    """
+    Массовый импорт мероприятий из CSV или NDJSON (формат — services/event_import.py).
+    Организатором импортированных мероприятий становится администратор.
+    Возвращает итоговый отчет с ошибками по номерам строк файла.
+    """
+    fmt = (format or detect_format(file.filename, file.content_type)).lower()
+    if fmt not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неподдерживаемый формат: {fmt}"
+        )
+
+    importer = EventImporter(
+        engine,
+        organizer_id=current_user.id,
+        status=event_status,
+        create_categories=create_categories,
+        dry_run=dry_run,
+    )
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        async for report in importer.import_rows(read_rows(stream, fmt)):
+            logger.info("Event import %s: %s", file.filename, report.progress())
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Файл должен быть в кодировке UTF-8"
+        )
+    finally:
+        # Файл закрывает FastAPI; обертку отсоединяем, чтобы она его не закрыла
+        stream.detach()
+
+    if importer.report.inserted:
+        invalidate_responses()
+    return importer.report.as_dict()
@@ -2,64 +2,66 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from datetime import datetime, timedelta
+import math
+from datetime import timedelta
 from typing import Optional
-from jose import JWTError, jwt
 from database import get_db
 from models.models import User, UserRole
-from schemas.schemas import UserCreate, UserResponse, Token
-from utils.auth import verify_password, get_password_hash, create_access_token
-from utils.password import verify_password, get_password_hash
+from schemas.schemas import UserCreate, UserResponse, Token, TokenRefresh
+from utils.auth import (
+    create_access_token, create_refresh_token, resolve_user, decode_token, revoke_token
+)
+from utils.revocation import revoke_claims
+from utils.password import get_password_hash_async
+from services.user_service import check_password
+from utils.log import get_logger
+from utils.ratelimit import check_login_attempt, get_client_ip
 
 router = APIRouter(tags=["auth"])
 
+logger = get_logger(__name__)
+
 # Настройки JWT
 SECRET_KEY = "your-secret-key-here"  # В продакшене использовать безопасный ключ из переменных окружения
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token", auto_error=False)
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+def issue_tokens(email: str) -> dict:
+    access_token = create_access_token(
+        data={"sub": email}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": create_refresh_token(email),
+        "token_type": "bearer",
+    }
 
 async def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
-    print(f"\n=== Получение текущего пользователя ===")
-    print(f"Заголовки запроса: {request.headers}")
-    print(f"Полученный токен: {token[:10]}...")
-    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        print(f"Декодированный payload: {payload}")
-        
-        if username is None:
-            print("Username не найден в payload")
-            raise credentials_exception
-    except JWTError as e:
-        print(f"Ошибка декодирования JWT: {e}")
+    # Подпись и срок действия проверяются через кэш проверенных токенов
+    payload = decode_token(token)
+    if payload is None:
+        logger.debug("Invalid, expired or revoked token")
         raise credentials_exception
     
-    result = await db.execute(select(User).filter(User.email == username))
-    user = result.scalar_one_or_none()
+    username = payload.get("sub")
+    if username is None:
+        logger.debug("Token without subject")
+        raise credentials_exception
+    
+    user = await resolve_user(username, db)
     
     if user is None:
-        print(f"Пользователь не найден: {username}")
+        logger.debug("Token subject not found: %s", username)
         raise credentials_exception
     
-    print(f"Пользователь найден: {user.email}")
     return user
 
 @router.post("/register", response_model=UserResponse)
@@ -87,7 +89,7 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
         )
 
     # Создаем нового пользователя
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     
     # Преобразуем строковую роль в значение перечисления
     try:
@@ -111,9 +113,17 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     return db_user
 
 @router.post("/token", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
-    print(f"\n=== Попытка входа ===")
-    print(f"Email: {form_data.username}")
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    # Ограничение попыток проверяется до обращения к базе и bcrypt
+    client_ip = get_client_ip(request)
+    retry_after = check_login_attempt(client_ip, form_data.username)
+    if retry_after:
+        logger.info("Login throttled for %s from %s", form_data.username, client_ip)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
     
     try:
         # Ищем пользователя по email
@@ -122,35 +132,29 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
         user = result.scalar_one_or_none()
         
         if not user:
-            print(f"Пользователь не найден: {form_data.username}")
+            logger.info("Login failed: unknown user %s", form_data.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Проверяем пароль
-        if not verify_password(form_data.password, user.hashed_password):
-            print(f"Неверный пароль для пользователя: {form_data.username}")
+        # Проверяем пароль; устаревший по стоимости хеш перехешируется
+        if not await check_password(db, user, form_data.password):
+            logger.info("Login failed: wrong password for %s", form_data.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Создаем токен доступа
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user.email}, expires_delta=access_token_expires
-        )
-        
-        print(f"Успешный вход для пользователя: {form_data.username}")
-        return {"access_token": access_token, "token_type": "bearer"}
+        logger.info("Login succeeded for %s", form_data.username)
+        return issue_tokens(user.email)
         
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"Ошибка при входе: {str(e)}")
+    except Exception:
+        logger.exception("Login error for %s", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during authentication"
@@ -158,13 +162,53 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
 
 @router.get("/me", response_model=UserResponse)
 async def read_users_me(request: Request, current_user: User = Depends(get_current_user)):
-    print(f"\n=== Получение профиля пользователя ===")
-    print(f"Заголовки запроса: {request.headers}")
-    print(f"Текущий пользователь: {current_user.email}")
     return current_user
 
+@router.post("/token/refresh", response_model=Token)
+async def refresh_access_token(body: TokenRefresh, db: AsyncSession = Depends(get_db)):
+    """
+    Выдает новую пару токенов по refresh-токену без проверки пароля.
+    Использованный refresh-токен отзывается (ротация).
+    """
+    claims = decode_token(body.refresh_token, token_type="refresh")
+    email = claims.get("sub") if claims is not None else None
+    if email is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user = await resolve_user(email, db)
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Ротация: отзыв — INSERT jti в revoked_tokens, поэтому из нескольких
+    # запросов с одним refresh-токеном новую пару получает только первый
+    if not await revoke_claims(db, claims):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    revoke_token(body.refresh_token)
+    return issue_tokens(user.email)
+
 @router.post("/logout")
-async def logout():
-    # В JWT нет встроенного механизма для выхода, так как токены не хранятся на сервере
-    # В реальном приложении можно добавить токен в черный список или использовать refresh tokens
+async def logout(
+    body: Optional[TokenRefresh] = None,
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    # Отзываем access-токен из заголовка и, если передан, refresh-токен
+    if token:
+        await revoke_claims(db, decode_token(token))
+        revoke_token(token)
+    if body is not None:
+        await revoke_claims(db, decode_token(body.refresh_token, token_type="refresh"))
+        revoke_token(body.refresh_token)
     return {"message": "Successfully logged out"} 
\ No newline at end of file
@@ -1,35 +1,152 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
-from datetime import date
-from database import get_db
+from sqlalchemy import select, or_, and_
+from sqlalchemy.orm import selectinload, joinedload
+from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+import os
+from database import get_read_db
 from models import models
 from schemas import schemas
+from services.event_serializer import serialize_events, dumps, JSONBytesResponse
+from utils.cache import response_cache
+from utils.streaming import wants_ndjson, ndjson_response
 
 router = APIRouter(
     tags=["calendar"]
 )
 
+# Максимальная длина запрашиваемого диапазона
+CALENDAR_MAX_RANGE_DAYS = int(os.environ.get("CALENDAR_MAX_RANGE_DAYS", "92"))
+# Насколько раньше начала диапазона искать начавшиеся многодневные события
+CALENDAR_MAX_EVENT_DAYS = int(os.environ.get("CALENDAR_MAX_EVENT_DAYS", "92"))
+
 @router.get("/calendar", response_model=List[schemas.EventResponse])
-async def get_calendar_events(db: AsyncSession = Depends(get_db)):
+async def get_calendar_events(
+    request: Request,
+    stream: bool = Query(False, description="Stream events as NDJSON (same as Accept: application/x-ndjson)"),
+    db: AsyncSession = Depends(get_read_db)
+):
     """Получить все события для календаря"""
-    query = select(models.Event)
+    # Связи загружаются заранее: ленивая загрузка при сериализации
+    # ответа в асинхронной сессии невозможна
+    query = select(models.Event).options(
+        joinedload(models.Event.organizer),
+        selectinload(models.Event.images),
+        selectinload(models.Event.categories)
+    )
+    if wants_ndjson(request, stream):
+        query = query.order_by(models.Event.start_date.asc().nulls_first(), models.Event.id)
+        return ndjson_response(query, serialize_events)
+
     result = await db.execute(query)
     events = result.scalars().all()
     return events
 
+@router.get("/calendar/range")
+async def get_calendar_range(
+    start: date = Query(..., description="First visible day (YYYY-MM-DD)"),
+    end: date = Query(..., description="Last visible day, inclusive (YYYY-MM-DD)"),
+    status: Optional[models.EventStatus] = Query(
+        models.EventStatus.APPROVED,
+        description="Only events with this status"
+    ),
+    include_archived: bool = Query(False, description="Also include archived (finished) events"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    События видимого диапазона календаря: количество событий по дням
+    (многодневные события учитываются в каждом дне) и краткие карточки.
+
+    Выборка ограничена по start_date с обеих сторон, поэтому читает только
+    строки около диапазона по индексу (status, start_date). События длиннее
+    CALENDAR_MAX_EVENT_DAYS, начавшиеся до этого окна, не попадают в выборку.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days + 1 > CALENDAR_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range must not exceed {CALENDAR_MAX_RANGE_DAYS} days"
+        )
+
+    cache_key = ("calendar_range", start, end, status, include_archived)
+    cache_version = response_cache.version
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return JSONBytesResponse(cached)
+
+    range_start = datetime.combine(start, time.min)
+    range_end = datetime.combine(end + timedelta(days=1), time.min)
+
+    # Архив читается только по запросу; строки обеих таблиц сливаются по дате
+    tiers = [models.Event, models.ArchivedEvent] if include_archived else [models.Event]
+    rows = []
+    for Event in tiers:
+        query = select(
+            Event.id,
+            Event.title,
+            Event.location,
+            Event.start_date,
+            Event.end_date,
+            Event.status,
+            Event.event_type,
+            Event.current_participants,
+            Event.max_participants
+        ).where(
+            # Пересечение интервалов с ограниченным окном по start_date
+            Event.start_date >= range_start - timedelta(days=CALENDAR_MAX_EVENT_DAYS),
+            Event.start_date < range_end,
+            or_(
+                Event.end_date >= range_start,
+                and_(Event.end_date.is_(None), Event.start_date >= range_start)
+            )
+        ).order_by(Event.start_date, Event.id)
+        if status is not None:
+            query = query.where(Event.status == status)
+        rows.extend((await db.execute(query)).all())
+    if len(tiers) > 1:
+        rows.sort(key=lambda row: (row.start_date, row.id))
+
+    events = []
+    days = {}
+    for row in rows:
+        events.append(dict(row._mapping))
+        first_day = max(row.start_date.date(), start)
+        last_day = min((row.end_date or row.start_date).date(), end)
+        day = first_day
+        while day <= last_day:
+            days.setdefault(day, []).append(row.id)
+            day += timedelta(days=1)
+
+    body = dumps({
+        "start": start,
+        "end": end,
+        "days": [
+            {"date": day, "count": len(event_ids), "event_ids": event_ids}
+            for day, event_ids in sorted(days.items())
+        ],
+        "events": events
+    })
+    response_cache.set(cache_key, body, version=cache_version)
+    return JSONBytesResponse(body)
+
 @router.get("/date/{date_str}", response_model=List[schemas.EventResponse])
-async def get_events_by_date(date_str: str, db: AsyncSession = Depends(get_db)):
+async def get_events_by_date(date_str: str, db: AsyncSession = Depends(get_read_db)):
     """Получить события на конкретную дату"""
     try:
         target_date = date.fromisoformat(date_str)
     except ValueError:
         raise HTTPException(status_code=400, detail="Неверный формат даты")
     
-    query = select(models.Event).where(
-        models.Event.start_date >= target_date,
-        models.Event.start_date < target_date.replace(day=target_date.day + 1)
+    day_start = datetime.combine(target_date, time.min)
+    query = select(models.Event).options(
+        joinedload(models.Event.organizer),
+        selectinload(models.Event.images),
+        selectinload(models.Event.categories)
+    ).where(
+        models.Event.start_date >= day_start,
+        models.Event.start_date < day_start + timedelta(days=1)
     )
     result = await db.execute(query)
     events = result.scalars().all()
@@ -2,33 +2,36 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
-from database import get_db
+from database import get_db, get_read_db
 from models import models
 from schemas import schemas
 from utils.auth import get_current_user
+from utils.cache import response_cache, invalidate_responses
+from utils.log import get_logger
 
 router = APIRouter(
     tags=["categories"]
 )
 
+logger = get_logger(__name__)
+
 @router.get("/")
 async def read_categories(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Эндпоинт для получения категорий из базы данных"""
     try:
-        print("Starting read_categories function")
-        print(f"Parameters: skip={skip}, limit={limit}")
-        query = select(models.Category).offset(skip).limit(limit)
-        print(f"Query: {query}")
+        cache_key = ("categories", skip, limit)
+        cache_version = response_cache.version
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
+        query = select(models.Category).offset(skip).limit(limit)
         result = await db.execute(query)
-        print("Query executed successfully")
-        
         categories = result.scalars().all()
-        print(f"Found {len(categories)} categories")
         
         # Преобразуем в список словарей
         categories_list = []
@@ -39,13 +42,12 @@ async def read_categories(
                 "description": category.description
             })
         
-        print(f"Categories: {categories_list}")
+        logger.debug("read_categories skip=%s limit=%s found=%d", skip, limit, len(categories_list))
+        response_cache.set(cache_key, categories_list, version=cache_version)
         return categories_list
         
     except Exception as e:
-        print(f"Error in read_categories: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in read_categories")
         
         # В случае ошибки возвращаем статические данные
         fallback_categories = [
@@ -75,13 +77,14 @@ async def create_category(
     db_category = models.Category(**category.dict())
     db.add(db_category)
     await db.commit()
+    invalidate_responses()
     await db.refresh(db_category)
     return db_category
 
 @router.get("/{category_id}", response_model=schemas.CategoryResponse)
 async def read_category(
     category_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     query = select(models.Category).where(models.Category.id == category_id)
     result = await db.execute(query)
@@ -119,6 +122,7 @@ async def update_category(
         setattr(category, field, value)
     
     await db.commit()
+    invalidate_responses()
     await db.refresh(category)
     return category
 
@@ -154,4 +158,5 @@ async def delete_category(
     
     await db.delete(category)
     await db.commit()
+    invalidate_responses()
     return {"message": "Category deleted successfully"} 
\ No newline at end of file
@@ -6,6 +6,7 @@ from database import get_db
 from models import models
 from schemas import schemas
 from utils.auth import get_current_user
+from utils.cache import invalidate_responses
 
 router = APIRouter(
     tags=["event_creation"]
@@ -51,6 +52,7 @@ async def create_event(
         # Сохраняем в базу данных
         db.add(db_event)
         await db.commit()
+        invalidate_responses()
         await db.refresh(db_event)
 
         return db_event
@@ -1,23 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, exists, literal, DateTime
 from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload, joinedload
 from typing import List, Optional
 from datetime import datetime
-from database import get_db
+from database import get_db, get_read_db
 from models import models
 from schemas import schemas
 from utils.auth import get_current_user
+from utils.pagination import encode_cursor, after_date_id
+from utils.cache import response_cache, invalidate_responses
+from utils.streaming import wants_ndjson, ndjson_response
+from utils.log import get_logger
 import shutil
 import os
 from pathlib import Path
+from functools import partial
+from services import event_search
+from services.event_search import build_match_query, apply_search
+from services.event_serializer import (
+    event_to_dict, load_participants, serialize_events, dumps, JSONBytesResponse,
+    parse_event_fields, event_load_options
+)
+from services.event_archive import event_tier
 from services.event_service import create_event as create_event_service, get_event, update_event, delete_event
 
 router = APIRouter(
     tags=["events"]
 )
 
+logger = get_logger(__name__)
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated event columns to return (id is always included); "
+    "relations are then omitted unless listed in include"
+)
+INCLUDE_DESCRIPTION = "Comma-separated relations to return: organizer, categories, images, participants"
+
 UPLOAD_DIR = Path("uploads/events")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -70,71 +91,17 @@ async def create_event(
 
     db.add(db_event)
     await db.commit()
-    await db.refresh(db_event)
-
-    # Явно загружаем связанные объекты
-    categories = []
-    if db_event.id:
-        result = await db.execute(
-            select(models.Category).join(models.event_categories).where(models.event_categories.c.event_id == db_event.id)
-        )
-        categories = result.scalars().all()
-
-    images = []
-    if db_event.id:
-        result = await db.execute(
-            select(models.EventImage).where(models.EventImage.event_id == db_event.id)
-        )
-        images = result.scalars().all()
+    invalidate_responses()
 
-    organizer = None
-    if db_event.organizer_id:
-        result = await db.execute(
-            select(models.User).where(models.User.id == db_event.organizer_id)
-        )
-        organizer = result.scalar_one_or_none()
-
-    event_dict = {
-        "id": db_event.id,
-        "title": db_event.title,
-        "short_description": db_event.short_description,
-        "full_description": db_event.full_description,
-        "location": db_event.location,
-        "start_date": db_event.start_date.isoformat() if db_event.start_date else None,
-        "end_date": db_event.end_date.isoformat() if db_event.end_date else None,
-        "max_participants": db_event.max_participants,
-        "current_participants": db_event.current_participants,
-        "status": db_event.status.value if db_event.status else None,
-        "event_type": db_event.event_type.value if db_event.event_type else None,
-        "ticket_price": db_event.ticket_price,
-        "image_url": db_event.image_url,
-        "organizer_id": db_event.organizer_id,
-        "created_at": db_event.created_at.isoformat() if db_event.created_at else None,
-        "rejection_reason": getattr(db_event, "rejection_reason", None),
-        "organizer": {
-            "id": organizer.id,
-            "username": organizer.username,
-            "email": organizer.email,
-            "full_name": organizer.full_name,
-            "role": organizer.role.value if hasattr(organizer, 'role') else None
-        } if organizer else None,
-        "categories": [
-            {
-                "id": cat.id,
-                "name": cat.name,
-                "description": cat.description
-            } for cat in categories
-        ] if categories else [],
-        "images": [
-            {
-                "id": img.id,
-                "image_url": img.image_url,
-                "created_at": img.created_at.isoformat() if img.created_at else None
-            } for img in images
-        ] if images else [],
-        "participants": []
-    }
-    return event_dict
+    # Перечитываем мероприятие вместе со связанными объектами одним запросом
+    result = await db.execute(
+        select(models.Event).where(models.Event.id == db_event.id).options(
+            joinedload(models.Event.organizer),
+            selectinload(models.Event.images),
+            selectinload(models.Event.categories)
+        ).execution_options(populate_existing=True)
+    )
+    return event_to_dict(result.scalar_one())
 
 @router.post("/{event_id}/images")
 async def upload_event_image(
@@ -163,38 +130,75 @@ async def upload_event_image(
     )
     db.add(image)
     await db.commit()
+    invalidate_responses()
     await db.refresh(image)
 
     return {"filename": file_name, "url": f"/uploads/events/{file_name}"}
 
 @router.get("/")
 async def get_events(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
     start_date: Optional[str] = Query(None, description="Start date in ISO format"),
     end_date: Optional[str] = Query(None, description="End date in ISO format"),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor; pass an empty value for the first page"
+    ),
+    stream: bool = Query(
+        False,
+        description="Stream all matching events as NDJSON, ignoring skip/limit/cursor "
+                    "(same as Accept: application/x-ndjson)"
+    ),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    archived: bool = Query(False, description="List archived (finished) events instead of current ones"),
+    db: AsyncSession = Depends(get_read_db)
 ):
+    # Неизвестные поля — ошибка клиента (400), разбираем до общего обработчика
+    event_fields = parse_event_fields(fields, include)
     try:
-        print("Starting get_events function")
-        print(f"Parameters: skip={skip}, limit={limit}, search={search}, start_date={start_date}, end_date={end_date}")
-        
-        query = select(models.Event).options(
-            joinedload(models.Event.organizer),
-            selectinload(models.Event.images),
-            selectinload(models.Event.categories)
+        logger.debug(
+            "get_events skip=%s limit=%s search=%r start_date=%s end_date=%s cursor=%s",
+            skip, limit, search, start_date, end_date, cursor
         )
         
+        search = " ".join(search.split()) if search else None
+        Event, participants_table = event_tier(archived)
+        streaming = wants_ndjson(request, stream)
+        if not streaming:
+            cache_key = ("events", archived, skip, limit, search, start_date, end_date, cursor, event_fields)
+            cache_version = response_cache.version
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                return JSONBytesResponse(cached)
+        
+        # Невыбранные колонки и связи не читаются из базы; start_date
+        # нужен в курсорном режиме для next_cursor
+        query = select(Event).options(*event_load_options(
+            event_fields,
+            extra_columns=("start_date",) if cursor is not None else (),
+            model=Event
+        ))
+        
         if search:
-            search_term = f"%{search}%"
-            query = query.where(
-                or_(
-                    models.Event.title.ilike(search_term),
-                    models.Event.short_description.ilike(search_term),
-                    models.Event.location.ilike(search_term)
+            # Индекс FTS5 строится только по горячей таблице
+            match = build_match_query(search) if event_search.fts_enabled and not archived else None
+            if match:
+                # Полнотекстовый поиск по FTS5; в курсорном режиме порядок
+                # задается ключом пагинации, а не релевантностью
+                query = apply_search(query, Event.id, match, rank=cursor is None)
+            else:
+                search_term = f"%{search}%"
+                query = query.where(
+                    or_(
+                        Event.title.ilike(search_term),
+                        Event.short_description.ilike(search_term),
+                        Event.location.ilike(search_term)
+                    )
                 )
-            )
         
         # Преобразуем строки в datetime объекты
         start_datetime = None
@@ -203,90 +207,56 @@ async def get_events(
         if start_date:
             try:
                 start_datetime = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                query = query.where(models.Event.end_date >= start_datetime)
-                print(f"Filtering by start_date: {start_datetime}")
-            except ValueError as e:
-                print(f"Invalid start_date format: {start_date}, error: {e}")
+                query = query.where(Event.end_date >= start_datetime)
+            except ValueError:
+                logger.info("Invalid start_date format: %r", start_date)
         
         if end_date:
             try:
                 end_datetime = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                query = query.where(models.Event.start_date <= end_datetime)
-                print(f"Filtering by end_date: {end_datetime}")
-            except ValueError as e:
-                print(f"Invalid end_date format: {end_date}, error: {e}")
+                query = query.where(Event.start_date <= end_datetime)
+            except ValueError:
+                logger.info("Invalid end_date format: %r", end_date)
         
-        query = query.offset(skip).limit(limit)
+        if streaming:
+            # Потоковая выгрузка всех найденных мероприятий порциями
+            if not (search and event_search.fts_enabled and not archived):
+                query = query.order_by(Event.start_date.asc().nulls_first(), Event.id)
+            return ndjson_response(query, partial(
+                serialize_events, fields=event_fields, participants_table=participants_table
+            ))
+        
+        if cursor is not None:
+            # Курсорный режим: сортировка по (start_date, id) и WHERE вместо OFFSET
+            query = query.order_by(Event.start_date.asc().nulls_first(), Event.id)
+            if cursor:
+                query = query.where(after_date_id(cursor, Event.start_date, Event.id))
+            # Запрашиваем на одну строку больше, чтобы понять, есть ли следующая страница
+            query = query.limit(limit + 1)
+        else:
+            query = query.offset(skip).limit(limit)
         result = await db.execute(query)
         events = result.unique().scalars().all()
+
+        next_cursor = None
+        if cursor is not None and len(events) > limit:
+            events = events[:limit]
+            next_cursor = encode_cursor(events[-1].start_date, events[-1].id)
         
-        print(f"Found {len(events)} events")
-        
-        # Преобразуем в список словарей для избежания проблем с сериализацией
-        events_list = []
-        for event in events:
-            # Получаем участников для каждого мероприятия
-            participants_query = select(models.event_participants).where(
-                models.event_participants.c.event_id == event.id
-            )
-            participants_result = await db.execute(participants_query)
-            participants = participants_result.fetchall()
-            
-            event_dict = {
-                "id": event.id,
-                "title": event.title,
-                "short_description": event.short_description,
-                "full_description": event.full_description,
-                "location": event.location,
-                "start_date": event.start_date.isoformat() if event.start_date else None,
-                "end_date": event.end_date.isoformat() if event.end_date else None,
-                "max_participants": event.max_participants,
-                "current_participants": event.current_participants,
-                "status": event.status.value if event.status else None,
-                "event_type": event.event_type.value if event.event_type else None,
-                "ticket_price": event.ticket_price,
-                "image_url": event.image_url,
-                "organizer_id": event.organizer_id,
-                "created_at": event.created_at.isoformat() if event.created_at else None,
-                "rejection_reason": getattr(event, "rejection_reason", None),
-                "organizer": {
-                    "id": event.organizer.id,
-                    "username": event.organizer.username,
-                    "email": event.organizer.email,
-                    "full_name": event.organizer.full_name,
-                    "role": event.organizer.role.value if hasattr(event.organizer, 'role') else None
-                } if event.organizer else None,
-                "categories": [
-                    {
-                        "id": cat.id,
-                        "name": cat.name,
-                        "description": cat.description
-                    } for cat in event.categories
-                ] if event.categories else [],
-                "images": [
-                    {
-                        "id": img.id,
-                        "image_url": img.image_url,
-                        "created_at": img.created_at.isoformat() if img.created_at else None
-                    } for img in event.images
-                ] if event.images else [],
-                "participants": [
-                    {
-                        "user_id": p.user_id,
-                        "event_id": p.event_id,
-                        "ticket_purchased": p.ticket_purchased
-                    } for p in participants
-                ] if participants else []
-            }
-            events_list.append(event_dict)
+        events_list = await serialize_events(db, events, event_fields, participants_table)
+        logger.debug("get_events returned %d events", len(events_list))
         
-        print(f"Returning {len(events_list)} events")
-        return events_list
+        response = events_list
+        if cursor is not None:
+            response = {"items": events_list, "next_cursor": next_cursor}
+        body = dumps(response)
+        response_cache.set(cache_key, body, version=cache_version)
+        return JSONBytesResponse(body)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in get_events: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_events")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -294,7 +264,7 @@ async def get_events(
 
 @router.get("/my", response_model=List[schemas.EventResponse])
 async def get_my_events(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     query = select(models.Event).where(
@@ -310,96 +280,54 @@ async def get_my_events(
 @router.get("/{event_id}")
 async def get_event(
     event_id: int,
-    db: AsyncSession = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    include_archived: bool = Query(False, description="Look the event up in the archive if it is not current"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     try:
-        print(f"Получен запрос на детали мероприятия с ID: {event_id}")
+        event_fields = parse_event_fields(fields, include)
+        cache_key = ("event", event_id, include_archived, event_fields)
+        cache_version = response_cache.version
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return JSONBytesResponse(cached)
         
         query = select(models.Event).where(
             models.Event.id == event_id
-        ).options(
-            joinedload(models.Event.organizer),
-            selectinload(models.Event.images),
-            selectinload(models.Event.categories)
-        )
+        ).options(*event_load_options(event_fields))
         result = await db.execute(query)
         event = result.scalar_one_or_none()
+        participants_table = models.event_participants
+
+        if event is None and include_archived:
+            Event, participants_table = event_tier(archived=True)
+            result = await db.execute(
+                select(Event).where(Event.id == event_id).options(*event_load_options(event_fields, model=Event))
+            )
+            event = result.scalar_one_or_none()
         
         if event is None:
-            print(f"Мероприятие с ID {event_id} не найдено")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Event not found"
             )
         
-        print(f"Мероприятие найдено: {event.title}")
-        
-        # Получаем участников мероприятия
-        participants_query = select(models.event_participants).where(
-            models.event_participants.c.event_id == event_id
-        )
-        participants_result = await db.execute(participants_query)
-        participants = participants_result.fetchall()
-        
-        print(f"Найдено участников: {len(participants)}")
+        # Получаем участников мероприятия, только если они запрошены
+        participants = []
+        if "participants" in event_fields:
+            participants = (await load_participants(db, [event_id], participants_table))[event_id]
         
-        # Преобразуем в словарь для избежания проблем с сериализацией
-        event_dict = {
-            "id": event.id,
-            "title": event.title,
-            "short_description": event.short_description,
-            "full_description": event.full_description,
-            "location": event.location,
-            "start_date": event.start_date.isoformat() if event.start_date else None,
-            "end_date": event.end_date.isoformat() if event.end_date else None,
-            "max_participants": event.max_participants,
-            "current_participants": event.current_participants,
-            "status": event.status.value if event.status else None,
-            "event_type": event.event_type.value if event.event_type else None,
-            "ticket_price": event.ticket_price,
-            "image_url": event.image_url,
-            "organizer_id": event.organizer_id,
-            "created_at": event.created_at.isoformat() if event.created_at else None,
-            "rejection_reason": getattr(event, "rejection_reason", None),
-            "organizer": {
-                "id": event.organizer.id,
-                "username": event.organizer.username,
-                "email": event.organizer.email,
-                "full_name": event.organizer.full_name,
-                "role": event.organizer.role.value if hasattr(event.organizer, 'role') else None
-            } if event.organizer else None,
-            "categories": [
-                {
-                    "id": cat.id,
-                    "name": cat.name,
-                    "description": cat.description
-                } for cat in event.categories
-            ] if event.categories else [],
-            "images": [
-                {
-                    "id": img.id,
-                    "image_url": img.image_url,
-                    "created_at": img.created_at.isoformat() if img.created_at else None
-                } for img in event.images
-            ] if event.images else [],
-            "participants": [
-                {
-                    "user_id": p.user_id,
-                    "event_id": p.event_id,
-                    "ticket_purchased": p.ticket_purchased
-                } for p in participants
-            ] if participants else []
-        }
-        
-        print(f"Возвращаем данные мероприятия: {event_dict['title']}")
-        return event_dict
+        event_dict = event_to_dict(event, participants, event_fields)
+        logger.debug("get_event id=%s participants=%d", event_id, len(participants))
+        body = dumps(event_dict)
+        response_cache.set(cache_key, body, version=cache_version)
+        return JSONBytesResponse(body)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_event: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_event id=%s", event_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -452,26 +380,6 @@ async def participate_in_event(
             detail="Cannot participate in unapproved event"
         )
 
-    if event.current_participants >= event.max_participants:
-        raise HTTPException(
-            status_code=400,
-            detail="Event is full"
-        )
-
-    # Проверяем, не участвует ли пользователь уже
-    query = select(models.event_participants).where(
-        models.event_participants.c.user_id == current_user.id,
-        models.event_participants.c.event_id == event_id
-    )
-    result = await db.execute(query)
-    existing_participation = result.first()
-    
-    if existing_participation:
-        raise HTTPException(
-            status_code=400,
-            detail="Already participating in this event"
-        )
-
     # Для платных мероприятий требуется покупка билета
     if event.event_type == models.EventType.PAID and not participation.ticket_purchased:
         raise HTTPException(
@@ -479,24 +387,67 @@ async def participate_in_event(
             detail="This is a paid event. Please purchase a ticket to participate"
         )
 
-    # Добавляем участие
-    await db.execute(
-        models.event_participants.insert().values(
-            user_id=current_user.id,
-            event_id=event_id,
-            ticket_purchased=participation.ticket_purchased
+    created_at = datetime.utcnow()
+    try:
+        # Проверяем вместимость условным UPDATE без изменения данных: он берет
+        # блокировку строки (или базы в SQLite), которая сериализует конкурирующие
+        # регистрации до конца транзакции. Сам счетчик увеличит триггер
+        # на event_participants (services/participant_counters.py)
+        result = await db.execute(
+            update(models.Event)
+            .where(
+                models.Event.id == event_id,
+                models.Event.status == models.EventStatus.APPROVED,
+                models.Event.current_participants < models.Event.max_participants
+            )
+            .values(current_participants=models.Event.current_participants)
+            .execution_options(synchronize_session=False)
         )
-    )
+        if result.rowcount == 0:
+            await db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail="Event is full"
+            )
 
-    # Увеличиваем счетчик участников
-    event.current_participants += 1
-    await db.commit()
+        # Добавляем участие, только если его еще нет; уникальный индекс
+        # (event_id, user_id) страхует от дублей на уровне базы
+        participants = models.event_participants
+        result = await db.execute(
+            participants.insert().from_select(
+                ["user_id", "event_id", "ticket_purchased", "created_at"],
+                select(
+                    literal(current_user.id),
+                    literal(event_id),
+                    literal(bool(participation.ticket_purchased)),
+                    literal(created_at, DateTime)
+                ).where(
+                    ~exists().where(
+                        participants.c.user_id == current_user.id,
+                        participants.c.event_id == event_id
+                    )
+                )
+            )
+        )
+        already_participating = result.rowcount == 0
+        if not already_participating:
+            await db.commit()
+    except IntegrityError:
+        already_participating = True
+
+    if already_participating:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Already participating in this event"
+        )
+    invalidate_responses()
 
     return schemas.ParticipationResponse(
         user_id=current_user.id,
         event_id=event_id,
         ticket_purchased=participation.ticket_purchased,
-        created_at=datetime.utcnow()
+        created_at=created_at
     )
 
 @router.delete("/{event_id}/participate")
@@ -513,30 +464,22 @@ async def cancel_participation(
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    # Проверяем, участвует ли пользователь в мероприятии
-    query = select(models.event_participants).where(
-        models.event_participants.c.user_id == current_user.id,
-        models.event_participants.c.event_id == event_id
-    )
-    result = await db.execute(query)
-    existing_participation = result.first()
-    
-    if not existing_participation:
-        raise HTTPException(
-            status_code=400,
-            detail="You are not participating in this event"
-        )
-
-    # Удаляем участие
-    await db.execute(
+    # Удаляем участие; число удаленных строк показывает, было ли оно.
+    # Счетчик участников уменьшит триггер
+    result = await db.execute(
         models.event_participants.delete().where(
             models.event_participants.c.user_id == current_user.id,
             models.event_participants.c.event_id == event_id
         )
     )
+    if result.rowcount == 0:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="You are not participating in this event"
+        )
 
-    # Уменьшаем счетчик участников
-    event.current_participants = max(0, event.current_participants - 1)
     await db.commit()
+    invalidate_responses()
 
     return {"message": "Participation cancelled successfully"} 
\ No newline at end of file
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_
-from typing import List
-from database import get_db
+from typing import List, Optional, Union
+from database import get_db, get_read_db
 from models import models
 from schemas import schemas
-from utils.auth import get_current_user, get_password_hash
+from utils.auth import get_current_user, invalidate_user
+from utils.password import get_password_hash_async
+from utils.pagination import encode_cursor, after_id
+from utils.cache import invalidate_responses
+from utils.log import get_logger
+from services.event_archive import event_tier
 from datetime import datetime
 from sqlalchemy.orm import joinedload, selectinload
 
@@ -13,6 +18,8 @@ router = APIRouter(
     tags=["users"]
 )
 
+logger = get_logger(__name__)
+
 @router.post("/", response_model=schemas.UserResponse)
 async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     # Проверяем, не существует ли уже пользователь с таким email
@@ -38,7 +45,7 @@ async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_d
         )
 
     # Создаем нового пользователя
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     
     # Преобразуем строковую роль в значение перечисления
     try:
@@ -67,11 +74,15 @@ async def read_users_me(
 ):
     return current_user
 
-@router.get("/", response_model=List[schemas.UserResponse])
+@router.get("/", response_model=Union[List[schemas.UserResponse], schemas.UserPage])
 async def read_users(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor; pass an empty value for the first page"
+    ),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     if current_user.role != models.UserRole.ADMIN:
@@ -79,15 +90,32 @@ async def read_users(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    query = select(models.User).offset(skip).limit(limit)
+    if cursor is None:
+        query = select(models.User).offset(skip).limit(limit)
+        result = await db.execute(query)
+        users = result.scalars().all()
+        return users
+
+    # Курсорный режим: сортировка по id и WHERE вместо OFFSET
+    query = select(models.User).order_by(models.User.id).limit(limit + 1)
+    if cursor:
+        query = query.where(after_id(cursor, models.User.id))
     result = await db.execute(query)
     users = result.scalars().all()
-    return users
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].id)
+    return {
+        "items": users,
+        "next_cursor": next_cursor
+    }
 
 @router.get("/{user_id}", response_model=schemas.UserResponse)
 async def read_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     query = select(models.User).where(models.User.id == user_id)
     result = await db.execute(query)
@@ -113,10 +141,13 @@ async def update_user(
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     
+    old_email = db_user.email
     for field, value in user.dict(exclude_unset=True).items():
         setattr(db_user, field, value)
     
     await db.commit()
+    invalidate_responses()
+    invalidate_user(old_email, db_user.email)
     await db.refresh(db_user)
     return db_user
 
@@ -138,16 +169,16 @@ async def delete_user(
     
     await db.delete(db_user)
     await db.commit()
+    invalidate_responses()
+    invalidate_user(db_user.email)
     return {"message": "User deleted successfully"}
 
 @router.get("/me/events", response_model=List[schemas.EventResponse])
 async def read_user_events(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     try:
-        print(f"Loading events for user {current_user.id} with role {current_user.role}")
-        
         # Создаем один запрос с условиями для организатора и участника
         query = select(models.Event).options(
             joinedload(models.Event.organizer),
@@ -157,10 +188,8 @@ async def read_user_events(
 
         # Если пользователь организатор, показываем его мероприятия
         if current_user.role == models.UserRole.ORGANIZER:
-            print("User is organizer, loading created events")
             query = query.where(models.Event.organizer_id == current_user.id)
         else:
-            print("User is participant, loading participated events")
             query = query.where(
                 models.Event.id.in_(
                     select(models.event_participants.c.event_id).where(
@@ -171,13 +200,11 @@ async def read_user_events(
         
         result = await db.execute(query)
         events = result.unique().scalars().all()
-        print(f"Found {len(events)} events")
+        logger.debug("read_user_events user=%s role=%s found=%d", current_user.id, current_user.role, len(events))
         
         return events
     except Exception as e:
-        print(f"Error in read_user_events: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in read_user_events user=%s", current_user.id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error loading events: {str(e)}"
@@ -185,7 +212,7 @@ async def read_user_events(
 
 @router.get("/me/upcoming-events", response_model=List[schemas.EventResponse])
 async def read_user_upcoming_events(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     now = datetime.utcnow()
@@ -213,28 +240,35 @@ async def read_user_upcoming_events(
 
 @router.get("/me/past-events", response_model=List[schemas.EventResponse])
 async def read_user_past_events(
-    db: AsyncSession = Depends(get_db),
+    include_archived: bool = Query(False, description="Also include archived events"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     now = datetime.utcnow()
     
-    # Создаем один запрос с условиями для организатора и участника
-    query = select(models.Event).options(
-        joinedload(models.Event.organizer),
-        selectinload(models.Event.images),
-        selectinload(models.Event.categories)
-    ).where(
-        or_(
-            models.Event.organizer_id == current_user.id,
-            models.Event.id.in_(
-                select(models.event_participants.c.event_id).where(
-                    models.event_participants.c.user_id == current_user.id
+    # Создаем один запрос с условиями для организатора и участника;
+    # архивные мероприятия читаются только по запросу
+    events = []
+    for archived in ((False, True) if include_archived else (False,)):
+        Event, participants = event_tier(archived)
+        query = select(Event).options(
+            joinedload(Event.organizer),
+            selectinload(Event.images),
+            selectinload(Event.categories)
+        ).where(
+            or_(
+                Event.organizer_id == current_user.id,
+                Event.id.in_(
+                    select(participants.c.event_id).where(
+                        participants.c.user_id == current_user.id
+                    )
                 )
-            )
-        ),
-        models.Event.end_date < now
-    ).order_by(models.Event.start_date.desc())
-    
-    result = await db.execute(query)
-    events = result.unique().scalars().all()
-    return events 
\ No newline at end of file
+            ),
+            Event.end_date < now
+        ).order_by(Event.start_date.desc())
+        
+        result = await db.execute(query)
+        events.extend(result.unique().scalars().all())
+    if include_archived:
+        events.sort(key=lambda event: event.start_date, reverse=True)
+    return events
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Переносит в архив мероприятия, закончившиеся раньше заданного срока,
+вместе с участниками, категориями и изображениями (то же делает фоновая
+задача приложения)
+
+С --check на временной базе SQLite проверяется повторная архивация:
+перенос, добавление новых завершившихся мероприятий с изображениями
+и повторный перенос. Архив хранит исходные id, поэтому новые строки
+не должны получать id уже перенесенных.
+
+Запуск: python scripts/archive_events.py [--retention-days 30] [--batch-size 500]
+        python scripts/archive_events.py --check [--events 50]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, func
+
+from database import engine, make_engine, apply_sqlite_pragmas
+from models import models
+from services.event_archive import archive_past_events, ARCHIVE_RETENTION_DAYS, ARCHIVE_BATCH_SIZE
+from services.schema_migrations import run_migrations
+
+
+async def count(engine, table) -> int:
+    async with engine.connect() as conn:
+        return (await conn.execute(select(func.count()).select_from(table))).scalar()
+
+
+async def main(retention_days: int, batch_size: int):
+    await run_migrations(engine)
+    started = time.perf_counter()
+    moved = await archive_past_events(engine, retention_days, batch_size)
+    elapsed = time.perf_counter() - started
+    print(f"Перенесено мероприятий: {moved} за {elapsed:.2f} с")
+    print(f"В events: {await count(engine, models.Event.__table__)}, в архиве: {await count(engine, models.ArchivedEvent.__table__)}")
+    await engine.dispose()
+
+
+async def insert_past_events(check_engine, events_count: int) -> None:
+    """Завершившиеся мероприятия, у каждого по изображению"""
+    ended = datetime.utcnow() - timedelta(days=ARCHIVE_RETENTION_DAYS + 1)
+    async with check_engine.begin() as conn:
+        for i in range(events_count):
+            event_id = (await conn.execute(insert(models.Event).values(
+                title=f"Прошедшее мероприятие {i}",
+                start_date=ended - timedelta(hours=2),
+                end_date=ended,
+                max_participants=10,
+                current_participants=0,
+                status=models.EventStatus.APPROVED,
+                organizer_id=1,
+            ))).inserted_primary_key[0]
+            await conn.execute(insert(models.EventImage).values(event_id=event_id, image_url=f"/static/{i}.jpg"))
+
+
+async def check(events_count: int, batch_size: int) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        check_engine = make_engine(f"sqlite+aiosqlite:///{tmp}/archive.db")
+        apply_sqlite_pragmas(check_engine)
+        await run_migrations(check_engine)
+        async with check_engine.begin() as conn:
+            await conn.execute(insert(models.User).values(
+                email="organizer@check.local", username="organizer", hashed_password="x",
+                role=models.UserRole.ORGANIZER,
+            ))
+
+        ok = True
+        try:
+            for round_number in (1, 2):
+                await insert_past_events(check_engine, events_count)
+                moved = await archive_past_events(check_engine, batch_size=batch_size)
+                archived = await count(check_engine, models.ArchivedEvent.__table__)
+                archived_images = await count(check_engine, models.ArchivedEventImage.__table__)
+                passed = moved == events_count and archived == archived_images == events_count * round_number
+                ok = ok and passed
+                print(f"[{'OK' if passed else 'FAIL'}] перенос {round_number}: перенесено {moved}, "
+                      f"в архиве {archived} мероприятий и {archived_images} изображений")
+        except Exception as e:
+            ok = False
+            print(f"[FAIL] повторная архивация: {e}")
+        finally:
+            await check_engine.dispose()
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retention-days", type=int, default=ARCHIVE_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--check", action="store_true", help="проверить повторную архивацию на временной базе")
+    parser.add_argument("--events", type=int, default=50, help="мероприятий на каждый перенос в --check")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(0 if asyncio.run(check(args.events, args.batch_size)) else 1)
+    asyncio.run(main(args.retention_days, args.batch_size))
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарк сериализации мероприятий
+
+Сравнивает стоимость сериализации одного мероприятия (с организатором,
+категориями, изображениями и участниками) в JSON-байты:
+  legacy       — словарь, собранный вручную, + jsonable_encoder + json.dumps
+                 (так ответ формировался до services/event_serializer.py);
+  shared/json  — event_to_dict + dumps на стандартном json;
+  shared/orjson — event_to_dict + dumps на orjson (если он установлен).
+
+База данных не используется: объекты создаются в памяти.
+
+Запуск: python scripts/bench_event_serializer.py [--events 1000] [--repeat 20]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from models import models
+from services import event_serializer
+from services.event_serializer import event_to_dict, dumps
+
+Participant = namedtuple("Participant", "user_id event_id ticket_purchased")
+
+
+def build_events(count: int):
+    organizer = models.User(
+        id=1, email="org@bench.local", username="org", full_name="Organizer",
+        role=models.UserRole.ORGANIZER
+    )
+    categories = [
+        models.Category(id=i, name=f"CATEGORY_{i}", description=f"Категория {i}")
+        for i in range(1, 4)
+    ]
+    now = datetime.utcnow()
+    events = []
+    for i in range(count):
+        event = models.Event(
+            id=i + 1,
+            title=f"Мероприятие {i}",
+            short_description="Краткое описание",
+            full_description="Полное описание мероприятия " * 10,
+            location="Москва",
+            start_date=now + timedelta(hours=i),
+            end_date=now + timedelta(hours=i + 2),
+            created_at=now,
+            max_participants=100,
+            current_participants=5,
+            event_type=models.EventType.FREE,
+            status=models.EventStatus.APPROVED,
+            organizer_id=1,
+        )
+        event.organizer = organizer
+        event.categories = categories
+        event.images = [
+            models.EventImage(id=i * 2 + j, event_id=i + 1, image_url=f"/uploads/events/{i}_{j}.webp", created_at=now)
+            for j in range(2)
+        ]
+        participants = [Participant(user_id, i + 1, False) for user_id in range(2, 7)]
+        events.append((event, participants))
+    return events
+
+
+def legacy_dumps(event, participants) -> bytes:
+    event_dict = {
+        "id": event.id,
+        "title": event.title,
+        "short_description": event.short_description,
+        "full_description": event.full_description,
+        "location": event.location,
+        "start_date": event.start_date.isoformat() if event.start_date else None,
+        "end_date": event.end_date.isoformat() if event.end_date else None,
+        "max_participants": event.max_participants,
+        "current_participants": event.current_participants,
+        "status": event.status.value if event.status else None,
+        "event_type": event.event_type.value if event.event_type else None,
+        "ticket_price": event.ticket_price,
+        "image_url": event.image_url,
+        "organizer_id": event.organizer_id,
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+        "rejection_reason": getattr(event, "rejection_reason", None),
+        "organizer": {
+            "id": event.organizer.id,
+            "username": event.organizer.username,
+            "email": event.organizer.email,
+            "full_name": event.organizer.full_name,
+            "role": event.organizer.role.value if hasattr(event.organizer, 'role') else None
+        } if event.organizer else None,
+        "categories": [
+            {"id": cat.id, "name": cat.name, "description": cat.description}
+            for cat in event.categories
+        ] if event.categories else [],
+        "images": [
+            {
+                "id": img.id,
+                "image_url": img.image_url,
+                "created_at": img.created_at.isoformat() if img.created_at else None
+            } for img in event.images
+        ] if event.images else [],
+        "participants": [
+            {"user_id": p.user_id, "event_id": p.event_id, "ticket_purchased": p.ticket_purchased}
+            for p in participants
+        ] if participants else []
+    }
+    return json.dumps(jsonable_encoder(event_dict), ensure_ascii=False).encode("utf-8")
+
+
+def shared_dumps(event, participants) -> bytes:
+    return dumps(event_to_dict(event, participants))
+
+
+def measure(name: str, func, events, repeat: int):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for event, participants in events:
+            func(event, participants)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    per_event_us = best / len(events) * 1_000_000
+    print(f"{name:<14} {per_event_us:>10.2f} µs/event")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    events = build_events(args.events)
+    measure("legacy", legacy_dumps, events, args.repeat)
+
+    orjson_module = event_serializer.orjson
+    event_serializer.orjson = None
+    measure("shared/json", shared_dumps, events, args.repeat)
+    event_serializer.orjson = orjson_module
+
+    if orjson_module is not None:
+        measure("shared/orjson", shared_dumps, events, args.repeat)
+    else:
+        print("shared/orjson  orjson is not installed")
+
+
+if __name__ == "__main__":
+    main()
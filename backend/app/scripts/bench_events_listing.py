@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк списка мероприятий (GET /api/events/)
+
+Заполняет временную базу SQLite мероприятиями и участниками, затем вызывает
+обработчик get_events с разными значениями limit и печатает количество
+SQL-запросов на один вызов и p95 задержки. При отсутствии N+1 количество
+запросов не должно расти вместе с limit.
+
+Запуск: python scripts/bench_events_listing.py [--events 2000] [--runs 30]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import inspect
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event as sa_event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from models import models
+from routers import events as events_router
+from utils.cache import response_cache
+
+LIMITS = [10, 50, 100, 500]
+
+
+def call_kwargs(func, **overrides):
+    """Подставляет значения по умолчанию для параметров FastAPI (Query(...))"""
+    kwargs = {}
+    for name, param in inspect.signature(func).parameters.items():
+        if name in overrides:
+            kwargs[name] = overrides[name]
+            continue
+        default = param.default
+        # Query(...) хранит настоящее значение по умолчанию в атрибуте default
+        if hasattr(default, "default"):
+            default = default.default
+        kwargs[name] = default
+    return kwargs
+
+
+async def seed(engine, events_count: int, participants_per_event: int):
+    """Заполняет базу тестовыми пользователями, мероприятиями и участниками"""
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+        users = [
+            {
+                "email": f"user{i}@bench.local",
+                "username": f"user{i}",
+                "full_name": f"User {i}",
+                "hashed_password": "x",
+                "role": models.UserRole.ORGANIZER if i == 0 else models.UserRole.VISITOR,
+            }
+            for i in range(participants_per_event + 1)
+        ]
+        await conn.execute(insert(models.User), users)
+
+        now = datetime.utcnow()
+        events = [
+            {
+                "title": f"Мероприятие {i}",
+                "short_description": "Краткое описание",
+                "full_description": "Полное описание мероприятия",
+                "location": "Москва",
+                "start_date": now + timedelta(hours=i),
+                "end_date": now + timedelta(hours=i + 2),
+                "max_participants": participants_per_event * 2,
+                "current_participants": participants_per_event,
+                "event_type": models.EventType.FREE,
+                "status": models.EventStatus.APPROVED,
+                "organizer_id": 1,
+            }
+            for i in range(events_count)
+        ]
+        await conn.execute(insert(models.Event), events)
+
+        participants = [
+            {"user_id": user_id, "event_id": event_id, "ticket_purchased": False}
+            for event_id in range(1, events_count + 1)
+            for user_id in range(2, participants_per_event + 2)
+        ]
+        await conn.execute(models.event_participants.insert(), participants)
+
+
+async def run(events_count: int, participants_per_event: int, runs: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        await seed(engine, events_count, participants_per_event)
+
+        query_count = 0
+
+        def count_query(*args, **kwargs):
+            nonlocal query_count
+            query_count += 1
+
+        sa_event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        request = Request({"type": "http", "method": "GET", "path": "/api/events/", "headers": []})
+
+        print(f"{'limit':>6} {'queries':>8} {'p50, ms':>9} {'p95, ms':>9}")
+        for limit in LIMITS:
+            timings = []
+            queries = 0
+            for _ in range(runs):
+                # Измеряем работу с базой, а не попадания в кэш ответов
+                response_cache.clear()
+                async with session_factory() as session:
+                    query_count = 0
+                    started = time.perf_counter()
+                    await events_router.get_events(
+                        **call_kwargs(events_router.get_events, request=request, limit=limit, db=session)
+                    )
+                    timings.append((time.perf_counter() - started) * 1000)
+                    queries = query_count
+            timings.sort()
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            print(f"{limit:>6} {queries:>8} {statistics.median(timings):>9.2f} {p95:>9.2f}")
+
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--participants", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.events, args.participants, args.runs))
+
+
+if __name__ == "__main__":
+    main()
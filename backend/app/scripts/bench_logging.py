@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарк трассировки запросов
+
+Сравнивает стоимость трассировки одного «запроса» в горячем пути:
+  print        — прежние print() с параметрами и списком результатов
+                 (stdout перенаправлен в файл);
+  log/INFO     — utils.log при уровне INFO: DEBUG-записи отбрасываются
+                 проверкой уровня, без форматирования;
+  log/DEBUG    — utils.log при уровне DEBUG с выборкой LOG_DEBUG_SAMPLE_RATE.
+
+Вывод уходит во временный файл, чтобы не зависеть от скорости терминала.
+
+Запуск: python scripts/bench_logging.py [--requests 20000] [--sample-rate 0.01]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import logging
+import tempfile
+import time
+
+from utils import log
+
+EVENTS = [{"id": i, "title": f"Мероприятие {i}", "location": "Москва"} for i in range(50)]
+
+
+def trace_print(i: int):
+    print("Starting get_events function")
+    print(f"Parameters: skip=0, limit=50, search=None, start_date=None, end_date=None, cursor={i}")
+    print(f"Found {len(EVENTS)} events")
+    print(f"Events: {EVENTS}")
+
+
+def trace_log(logger: logging.Logger, i: int):
+    log.start_request()
+    logger.debug(
+        "get_events skip=%s limit=%s search=%r start_date=%s end_date=%s cursor=%s",
+        0, 50, None, None, None, i
+    )
+    logger.debug("get_events returned %d events", len(EVENTS))
+
+
+def run_print(requests: int, out) -> float:
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        for i in range(requests):
+            trace_print(i)
+        out.flush()
+    return time.perf_counter() - started
+
+
+def run_log(requests: int, out, level: str, sample_rate: float) -> float:
+    os.environ["LOG_LEVEL"] = level
+    log.DEBUG_SAMPLE_RATE = sample_rate
+    with contextlib.redirect_stderr(out):
+        log.configure_logging()
+        logger = log.get_logger("routers.events")
+        started = time.perf_counter()
+        for i in range(requests):
+            trace_log(logger, i)
+        # Учитываем и время, за которое фоновый поток допишет очередь
+        log.shutdown_logging()
+        out.flush()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as out:
+        results = {
+            "print": run_print(args.requests, out),
+            "log/INFO": run_log(args.requests, out, "INFO", 1.0),
+            f"log/DEBUG sample={args.sample_rate}": run_log(args.requests, out, "DEBUG", args.sample_rate),
+            "log/DEBUG sample=1.0": run_log(args.requests, out, "DEBUG", 1.0),
+        }
+
+    for name, elapsed in results.items():
+        print(f"{name:28} {args.requests / elapsed:12,.0f} запросов/с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк записи в SQLite с профилем PRAGMA и без него
+
+Для каждого профиля создается временная база, после чего несколько
+конкурентных писателей вставляют мероприятия по одному в отдельных
+транзакциях (как это делают обработчики), а читатели параллельно
+выполняют выборку списка мероприятий. Выводится число фиксаций в секунду
+и число чтений за то же время.
+  default — настройки SQLite по умолчанию (rollback journal, synchronous=FULL);
+  profile — database.SQLITE_PRAGMAS (WAL, synchronous=NORMAL и т.д.).
+
+Запуск: python scripts/bench_sqlite_writes.py [--writes 2000] [--writers 8] [--readers 4]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.orm import sessionmaker
+
+from database import SQLITE_PRAGMAS, apply_sqlite_pragmas, read_sqlite_pragmas
+from models import models
+
+
+async def writer(session_factory, count: int):
+    now = datetime.utcnow()
+    for i in range(count):
+        async with session_factory() as session:
+            session.add(models.Event(
+                title=f"Мероприятие {i}",
+                short_description="Краткое описание",
+                full_description="Полное описание",
+                location="Москва",
+                start_date=now + timedelta(hours=i),
+                end_date=now + timedelta(hours=i + 2),
+                max_participants=100,
+                current_participants=0,
+                event_type=models.EventType.FREE,
+                status=models.EventStatus.APPROVED,
+                organizer_id=1,
+            ))
+            await session.commit()
+
+
+async def reader(session_factory, done: asyncio.Event) -> int:
+    reads = 0
+    while not done.is_set():
+        async with session_factory() as session:
+            await session.execute(
+                select(models.Event).order_by(models.Event.start_date.desc()).limit(50)
+            )
+        reads += 1
+    return reads
+
+
+async def run_profile(name: str, pragmas: dict, writes: int, writers: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp}/bench.db",
+            connect_args={"check_same_thread": False, "timeout": 60},
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=writers + readers,
+        )
+        apply_sqlite_pragmas(engine, pragmas)
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+            await conn.execute(models.User.__table__.insert().values(
+                id=1, email="org@bench.local", username="org", hashed_password="x",
+                role=models.UserRole.ORGANIZER
+            ))
+        async with engine.connect() as conn:
+            active = await read_sqlite_pragmas(conn)
+
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        done = asyncio.Event()
+        reader_tasks = [asyncio.create_task(reader(session_factory, done)) for _ in range(readers)]
+
+        started = time.perf_counter()
+        await asyncio.gather(*(writer(session_factory, writes // writers) for _ in range(writers)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        reads = sum(await asyncio.gather(*reader_tasks))
+        await engine.dispose()
+
+    return {
+        "name": name,
+        "commits_per_sec": (writes // writers) * writers / elapsed,
+        "reads_per_sec": reads / elapsed,
+        "pragmas": active,
+    }
+
+
+async def main_async(args):
+    results = [
+        await run_profile("default", {}, args.writes, args.writers, args.readers),
+        await run_profile("profile", SQLITE_PRAGMAS, args.writes, args.writers, args.readers),
+    ]
+    for result in results:
+        print(f"{result['name']:8} {result['commits_per_sec']:10,.0f} фиксаций/с "
+              f"{result['reads_per_sec']:10,.0f} чтений/с")
+        print("         " + ", ".join(f"{k}={v}" for k, v in result["pragmas"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
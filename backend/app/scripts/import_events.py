@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Массовый импорт мероприятий из CSV или NDJSON (то же делает
+POST /api/admin/import/events)
+
+Строки проверяются схемой EventCreate и вставляются пачками; после каждой
+пачки печатается прогресс. Ошибочные строки не останавливают импорт:
+они перечисляются в отчете, а с --errors записываются в файл NDJSON
+(номер строки и список ошибок).
+
+Формат CSV: заголовок title,short_description,full_description,location,
+start_date,end_date,max_participants,event_type,ticket_price,categories
+(категории — названия или коды через «;»). Подробнее — services/event_import.py.
+
+Запуск: python scripts/import_events.py events.csv --organizer-email admin@example.com
+        [--format csv|ndjson] [--status pending|approved] [--create-categories]
+        [--batch-size 1000] [--dry-run] [--errors errors.ndjson]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import io
+
+from sqlalchemy import select
+
+from database import engine
+from models import models
+from services.event_import import EventImporter, FORMATS, IMPORT_BATCH_SIZE, detect_format, read_rows
+from services.event_serializer import dumps
+
+
+async def find_organizer(email: str) -> int:
+    async with engine.connect() as conn:
+        organizer_id = (await conn.execute(
+            select(models.User.id).where(models.User.email == email)
+        )).scalar()
+    if organizer_id is None:
+        raise SystemExit(f"Пользователь {email} не найден")
+    return organizer_id
+
+
+async def main(args) -> bool:
+    importer = EventImporter(
+        engine,
+        organizer_id=await find_organizer(args.organizer_email),
+        status=models.EventStatus(args.status),
+        create_categories=args.create_categories,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        max_errors=None,
+    )
+    fmt = args.format or detect_format(args.path)
+
+    if args.path == "-":
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+    else:
+        stream = open(args.path, encoding="utf-8-sig", newline="")
+    with stream:
+        async for report in importer.import_rows(read_rows(stream, fmt)):
+            progress = report.progress()
+            print(
+                f"\rСтрок: {progress['processed']}, добавлено: {progress['inserted']}, "
+                f"ошибок: {progress['failed']} ({progress['rows_per_s']} строк/с)",
+                end="", flush=True
+            )
+    print()
+    await engine.dispose()
+
+    report = importer.report
+    if report.categories_created:
+        print(f"Созданы категории: {', '.join(report.categories_created)}")
+    if args.errors:
+        with open(args.errors, "wb") as f:
+            for error in report.errors:
+                f.write(dumps(error) + b"\n")
+        print(f"Ошибки записаны в {args.errors}")
+    else:
+        for error in report.errors[:20]:
+            messages = "; ".join(f"{item['field']}: {item['message']}" for item in error["errors"])
+            print(f"  строка {error['line']}: {messages}")
+        if len(report.errors) > 20:
+            print(f"  ... и еще {len(report.errors) - 20}")
+    print(f"Готово за {report.elapsed:.1f} с{' (проверка без записи)' if args.dry_run else ''}")
+    return report.failed == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="файл CSV/NDJSON или - для stdin")
+    parser.add_argument("--organizer-email", required=True, help="организатор импортируемых мероприятий")
+    parser.add_argument("--format", choices=FORMATS, help="по умолчанию по расширению файла")
+    parser.add_argument("--status", choices=[s.value for s in models.EventStatus], default=models.EventStatus.PENDING.value)
+    parser.add_argument("--create-categories", action="store_true", help="создавать недостающие категории")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="только проверить строки")
+    parser.add_argument("--errors", help="файл NDJSON для отчета об ошибках")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args)) else 1)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Сверяет events.current_participants с таблицей event_participants
+и исправляет расхождения (то же делает фоновая задача приложения)
+
+Запуск: python scripts/reconcile_participants.py [--batch-size 5000]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import time
+
+from database import engine
+from services.participant_counters import reconcile_participant_counters, RECONCILE_BATCH_SIZE
+
+
+async def main(batch_size: int):
+    started = time.perf_counter()
+    fixed = await reconcile_participant_counters(engine, batch_size)
+    await engine.dispose()
+    print(f"Исправлено мероприятий: {fixed} за {time.perf_counter() - started:.2f} с")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=RECONCILE_BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Нагрузочная проверка регистрации на мероприятие
+
+Создает временную базу SQLite с одним мероприятием ограниченной вместимости
+и одновременно запускает тысячи вызовов participate_in_event, в том числе
+повторные регистрации одних и тех же пользователей. После завершения
+проверяет, что мест занято не больше вместимости, нет повторных записей
+участия и счетчик current_participants совпадает с числом записей.
+
+Запуск: python scripts/stress_participation.py [--users 2000] [--capacity 500] [--attempts 2]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select, func, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.orm import sessionmaker
+
+from models import models
+from schemas import schemas
+from routers.events import participate_in_event
+from services.schema_migrations import run_migrations
+
+
+async def seed(engine, users_count: int, capacity: int) -> int:
+    # Схему и триггеры счетчика участников создают миграции
+    await run_migrations(engine)
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.User), [
+            {
+                "email": f"user{i}@stress.local",
+                "username": f"user{i}",
+                "hashed_password": "x",
+                "role": models.UserRole.VISITOR,
+            }
+            for i in range(users_count)
+        ])
+        now = datetime.utcnow()
+        result = await conn.execute(insert(models.Event).values(
+            title="Популярное мероприятие",
+            short_description="Мест мало",
+            full_description="Мест мало",
+            location="Москва",
+            start_date=now + timedelta(days=1),
+            end_date=now + timedelta(days=1, hours=2),
+            max_participants=capacity,
+            current_participants=0,
+            event_type=models.EventType.FREE,
+            status=models.EventStatus.APPROVED,
+            organizer_id=1,
+        ))
+        return result.inserted_primary_key[0]
+
+
+async def register(session_factory, event_id: int, user_id: int, outcomes: Counter):
+    async with session_factory() as session:
+        try:
+            await participate_in_event(
+                event_id=event_id,
+                participation=schemas.ParticipationCreate(event_id=event_id, ticket_purchased=False),
+                db=session,
+                current_user=models.User(id=user_id),
+            )
+            outcomes["registered"] += 1
+        except HTTPException as e:
+            outcomes[e.detail] += 1
+        except OperationalError as e:
+            outcomes[f"database error: {e.orig}"] += 1
+
+
+async def run(users_count: int, capacity: int, attempts: int) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp}/stress.db",
+            connect_args={"timeout": 60},
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=20,
+            max_overflow=0,
+            pool_timeout=600,
+        )
+        event_id = await seed(engine, users_count, capacity)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        user_ids = [user_id for user_id in range(1, users_count + 1) for _ in range(attempts)]
+        random.shuffle(user_ids)
+
+        outcomes = Counter()
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            register(session_factory, event_id, user_id, outcomes) for user_id in user_ids
+        ))
+        elapsed = time.perf_counter() - started
+
+        async with engine.connect() as conn:
+            rows = (await conn.execute(
+                select(func.count()).select_from(models.event_participants)
+                .where(models.event_participants.c.event_id == event_id)
+            )).scalar()
+            counter = (await conn.execute(
+                select(models.Event.current_participants).where(models.Event.id == event_id)
+            )).scalar()
+            duplicates = (await conn.execute(text(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM event_participants "
+                "GROUP BY event_id, user_id HAVING COUNT(*) > 1)"
+            ))).scalar()
+        await engine.dispose()
+
+    print(f"Запросов: {len(user_ids)} за {elapsed:.2f} с")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome}: {count}")
+    print(f"Записей участия: {rows}, current_participants: {counter}, повторов: {duplicates}")
+
+    expected = min(capacity, users_count)
+    checks = {
+        "занято ровно min(вместимость, пользователи) мест": rows == expected,
+        "счетчик совпадает с числом записей": counter == rows,
+        "повторных записей нет": duplicates == 0,
+        "успешных регистраций столько же, сколько записей": outcomes["registered"] == rows,
+    }
+    for name, passed in checks.items():
+        print(f"[{'OK' if passed else 'FAIL'}] {name}")
+    return all(checks.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--capacity", type=int, default=500)
+    parser.add_argument("--attempts", type=int, default=2, help="регистраций на пользователя")
+    args = parser.parse_args()
+    ok = asyncio.run(run(args.users, args.capacity, args.attempts))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
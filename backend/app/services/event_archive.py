@@ -0,0 +1,109 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from sqlalchemy import DateTime, Table, delete, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from models import models
+from utils.cache import invalidate_responses
+from utils.log import get_logger
+
+# Архивация завершившихся мероприятий.
+# Мероприятия, закончившиеся раньше чем ARCHIVE_RETENTION_DAYS дней назад,
+# вместе с участниками, категориями и изображениями переносятся в таблицы
+# archived_* (models.ArchivedEvent): горячая таблица events остается
+# небольшой, и публичный список, календарь и админка читают только ее.
+# Архив читается только по явному запросу (archived/include_archived
+# в обработчиках). Перенос идет пачками, каждая — в своей транзакции:
+# копирование и удаление атомарны, запись не блокируется надолго.
+# Строки переносятся с исходными id; в SQLite events и event_images
+# объявлены с AUTOINCREMENT, чтобы эти id не выдавались новым строкам.
+
+logger = get_logger(__name__)
+
+ARCHIVE_RETENTION_DAYS = int(os.environ.get("EVENTS_ARCHIVE_RETENTION_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("EVENTS_ARCHIVE_BATCH_SIZE", "500"))
+# 0 отключает фоновую архивацию
+ARCHIVE_INTERVAL = float(os.environ.get("EVENTS_ARCHIVE_INTERVAL", "3600"))
+
+# (горячая таблица, архивная); связанные строки идут раньше мероприятий,
+# чтобы при удалении не нарушались внешние ключи
+ARCHIVE_TABLES: List[Tuple[Table, Table]] = [
+    (models.event_participants, models.archived_event_participants),
+    (models.event_categories, models.archived_event_categories),
+    (models.EventImage.__table__, models.ArchivedEventImage.__table__),
+]
+
+def archive_candidates(cutoff: datetime, batch_size: int):
+    """
+    id очередной пачки мероприятий для переноса
+    """
+    return (
+        select(models.Event.id)
+        .where(models.Event.end_date < cutoff)
+        .order_by(models.Event.id)
+        .limit(batch_size)
+    )
+
+async def archive_past_events(
+    engine: AsyncEngine,
+    retention_days: int = ARCHIVE_RETENTION_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> int:
+    """
+    Переносит в архив мероприятия, закончившиеся раньше retention_days дней назад.
+    Возвращает число перенесенных мероприятий.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    events = models.Event.__table__
+    archived_events = models.ArchivedEvent.__table__
+    event_columns = [column.name for column in events.columns]
+
+    moved = 0
+    while True:
+        async with engine.begin() as conn:
+            event_ids = (await conn.execute(
+                archive_candidates(cutoff, batch_size)
+            )).scalars().all()
+            if not event_ids:
+                break
+
+            archived_at = datetime.utcnow()
+            await conn.execute(insert(archived_events).from_select(
+                event_columns + ["archived_at"],
+                select(*events.columns, literal(archived_at, DateTime)).where(events.c.id.in_(event_ids))
+            ))
+            for source, target in ARCHIVE_TABLES:
+                columns = [column.name for column in source.columns]
+                await conn.execute(insert(target).from_select(
+                    columns, select(*source.columns).where(source.c.event_id.in_(event_ids))
+                ))
+            for source, _ in ARCHIVE_TABLES:
+                await conn.execute(delete(source).where(source.c.event_id.in_(event_ids)))
+            await conn.execute(delete(events).where(events.c.id.in_(event_ids)))
+        moved += len(event_ids)
+
+    if moved:
+        invalidate_responses()
+    return moved
+
+async def archive_periodically(engine: AsyncEngine, interval: float = ARCHIVE_INTERVAL) -> None:
+    """
+    Фоновая архивация; запускается задачей при старте приложения
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            moved = await archive_past_events(engine)
+            if moved:
+                logger.info("Archived %d past events", moved)
+        except Exception:
+            logger.exception("Event archiving failed")
+
+def event_tier(archived: bool = False):
+    """
+    Модель мероприятий и таблица участников горячего или архивного слоя
+    """
+    if archived:
+        return models.ArchivedEvent, models.archived_event_participants
+    return models.Event, models.event_participants
@@ -0,0 +1,334 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from models import models
+from schemas import schemas
+
+try:
+    import orjson
+except ImportError:  # orjson не обязателен, без него используется стандартный json
+    orjson = None
+
+# Массовый импорт мероприятий из CSV и NDJSON.
+# Файл читается построчно, строки проверяются схемой EventCreate и вставляются
+# пачками: одна транзакция на пачку, мероприятия — одним executemany
+# (см. insert_events), связи с категориями — вторым executemany. Категории
+# загружаются одним запросом в начале импорта (по name и description без
+# учета регистра); недостающие при create_categories создаются одним INSERT
+# на пачку. Индекс поиска и счетчики поддерживают триггеры базы.
+#
+# Формат CSV: заголовок с именами полей EventCreate; категории — в колонке
+# categories (названия) или category_ids (id) через «;». Пустые ячейки
+# считаются отсутствующими значениями. В NDJSON categories и category_ids —
+# списки или строки через «;».
+
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_MAX_REPORTED_ERRORS = int(os.environ.get("IMPORT_MAX_REPORTED_ERRORS", "1000"))
+CATEGORY_SEPARATOR = ";"
+
+FORMATS = ("csv", "ndjson")
+
+class RowError(ValueError):
+    """Строку не удалось разобрать (битый JSON и т.п.)"""
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """
+    Формат по расширению файла или Content-Type; по умолчанию CSV
+    """
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    return "csv"
+
+def read_csv(stream: TextIO) -> Iterator[Tuple[int, Any]]:
+    """
+    (номер строки, словарь полей); номер — последняя строка файла, занятая записью
+    """
+    reader = csv.DictReader(stream)
+    for row in reader:
+        if None in row:
+            yield reader.line_num, RowError("Лишние значения в строке")
+            continue
+        yield reader.line_num, {
+            key.strip(): value.strip()
+            for key, value in row.items()
+            if key and value is not None and value.strip() != ""
+        }
+
+def read_ndjson(stream: TextIO) -> Iterator[Tuple[int, Any]]:
+    loads = orjson.loads if orjson is not None else json.loads
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = loads(line)
+        except ValueError as e:
+            yield line_no, RowError(f"Некорректный JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield line_no, RowError("Ожидается JSON-объект")
+            continue
+        yield line_no, row
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    if fmt == "ndjson":
+        return read_ndjson(stream)
+    return read_csv(stream)
+
+def _split(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(CATEGORY_SEPARATOR) if item.strip()]
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+async def insert_events(conn: AsyncConnection, values: List[dict]) -> List[int]:
+    """
+    Вставляет мероприятия одним executemany и возвращает их id в порядке строк.
+    На SQLite порядок строк RETURNING не гарантирован, а sort_by_parameter_order
+    заставил бы SQLAlchemy вставлять построчно. Поэтому id берутся из RETURNING
+    многострочных INSERT и сортируются: внутри одного INSERT SQLite выдает
+    rowid по возрастанию в порядке строк VALUES, а INSERT пачки идут подряд.
+    """
+    if conn.dialect.name == "sqlite":
+        return sorted((await conn.execute(insert(models.Event).returning(models.Event.id), values)).scalars())
+    return (await conn.execute(
+        insert(models.Event).returning(models.Event.id, sort_by_parameter_order=True),
+        values
+    )).scalars().all()
+
+class ImportReport:
+    """
+    Ход и итог импорта; ошибки хранятся не более max_errors штук
+    (None — без ограничения), но считаются все
+    """
+
+    def __init__(self, max_errors: Optional[int] = IMPORT_MAX_REPORTED_ERRORS, dry_run: bool = False):
+        self.max_errors = max_errors
+        self.dry_run = dry_run
+        self.processed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.batches = 0
+        self.categories_created: List[str] = []
+        self.errors: List[Dict[str, Any]] = []
+        self.started_at = time.perf_counter()
+
+    def add_error(self, line: int, errors: List[Dict[str, str]]) -> None:
+        self.failed += 1
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "errors": errors})
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def progress(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "batches": self.batches,
+            "elapsed_s": round(elapsed, 2),
+            "rows_per_s": round(self.processed / elapsed) if elapsed else 0,
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **self.progress(),
+            "dry_run": self.dry_run,
+            "categories_created": self.categories_created,
+            "errors_truncated": self.failed > len(self.errors),
+            "errors": self.errors,
+        }
+
+class _PreparedRow:
+    __slots__ = ("line", "values", "category_ids", "category_names")
+
+    def __init__(self, line: int, values: dict, category_ids: List[int], category_names: List[str]):
+        self.line = line
+        self.values = values
+        self.category_ids = category_ids
+        self.category_names = category_names
+
+class EventImporter:
+    """
+    Импорт одного файла: import_rows выдает отчет после каждой пачки
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        organizer_id: int,
+        status: models.EventStatus = models.EventStatus.PENDING,
+        create_categories: bool = False,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        dry_run: bool = False,
+        max_errors: Optional[int] = IMPORT_MAX_REPORTED_ERRORS,
+    ):
+        self.engine = engine
+        self.organizer_id = organizer_id
+        self.status = status
+        self.create_categories = create_categories
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.report = ImportReport(max_errors=max_errors, dry_run=dry_run)
+        self.categories: Dict[str, int] = {}
+        self.category_ids: Set[int] = set()
+
+    async def load_categories(self) -> None:
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(
+                select(models.Category.id, models.Category.name, models.Category.description)
+            )).all()
+        for category_id, name, description in rows:
+            self.category_ids.add(category_id)
+            for key in (description, name):
+                if key:
+                    self.categories[key.strip().lower()] = category_id
+
+    def prepare(self, line: int, row: Any) -> Optional[_PreparedRow]:
+        """
+        Проверяет строку; при ошибке записывает ее в отчет и возвращает None
+        """
+        if isinstance(row, RowError):
+            self.report.add_error(line, [{"field": "", "message": str(row)}])
+            return None
+
+        row = dict(row)
+        names = [str(name).strip() for name in _split(row.pop("categories", None))]
+        row["category_ids"] = _split(row.get("category_ids"))
+        if isinstance(row.get("event_type"), str):
+            row["event_type"] = row["event_type"].lower()
+
+        try:
+            event = schemas.EventCreate(**row)
+        except ValidationError as e:
+            self.report.add_error(line, [
+                {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+                for error in e.errors()
+            ])
+            return None
+
+        errors = []
+        unknown_ids = [category_id for category_id in event.category_ids if category_id not in self.category_ids]
+        if unknown_ids:
+            errors.append({"field": "category_ids", "message": f"Неизвестные категории: {unknown_ids}"})
+
+        category_ids = list(event.category_ids)
+        pending = []
+        for name in names:
+            category_id = self.categories.get(name.lower())
+            if category_id is not None:
+                category_ids.append(category_id)
+            elif self.create_categories:
+                pending.append(name)
+            else:
+                errors.append({"field": "categories", "message": f"Неизвестная категория: {name}"})
+        if errors:
+            self.report.add_error(line, errors)
+            return None
+
+        values = event.dict(exclude={"category_ids"})
+        values.update(
+            organizer_id=self.organizer_id,
+            status=self.status,
+            current_participants=0,
+            created_at=datetime.utcnow(),
+        )
+        return _PreparedRow(line, values, category_ids, pending)
+
+    async def _create_categories(self, names: Set[str]) -> None:
+        """
+        Создает недостающие категории одним INSERT; если их параллельно
+        создал кто-то другой, id берутся из повторной выборки
+        """
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(insert(models.Category), [
+                    {"name": name, "description": name} for name in sorted(names)
+                ])
+            self.report.categories_created.extend(sorted(names))
+        except IntegrityError:
+            pass
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(
+                select(models.Category.id, models.Category.name).where(models.Category.name.in_(names))
+            )).all()
+        for category_id, name in rows:
+            self.category_ids.add(category_id)
+            self.categories[name.lower()] = category_id
+
+    async def flush(self, batch: List[_PreparedRow]) -> None:
+        missing = {
+            name for row in batch for name in row.category_names
+            if name.lower() not in self.categories
+        }
+        if missing and not self.dry_run:
+            await self._create_categories(missing)
+
+        rows = []
+        for row in batch:
+            unresolved = [name for name in row.category_names if name.lower() not in self.categories]
+            if not unresolved:
+                row.category_ids.extend(self.categories[name.lower()] for name in row.category_names)
+            elif not self.dry_run:
+                self.report.add_error(row.line, [
+                    {"field": "categories", "message": f"Не удалось создать категории: {unresolved}"}
+                ])
+                continue
+            rows.append(row)
+
+        self.report.batches += 1
+        if self.dry_run or not rows:
+            return
+
+        try:
+            async with self.engine.begin() as conn:
+                event_ids = await insert_events(conn, [row.values for row in rows])
+                links = [
+                    {"event_id": event_id, "category_id": category_id}
+                    for event_id, row in zip(event_ids, rows)
+                    for category_id in dict.fromkeys(row.category_ids)
+                ]
+                if links:
+                    await conn.execute(insert(models.event_categories), links)
+        except SQLAlchemyError as e:
+            # Пачка откатывается целиком; остальные пачки продолжают загружаться
+            message = str(e.orig if getattr(e, "orig", None) is not None else e)
+            for row in rows:
+                self.report.add_error(row.line, [{"field": "", "message": f"Ошибка базы данных: {message}"}])
+            return
+        self.report.inserted += len(rows)
+
+    async def import_rows(self, rows: Iterable[Tuple[int, Any]]) -> AsyncIterator[ImportReport]:
+        """
+        Читает и вставляет строки пачками по batch_size; после каждой пачки
+        выдает отчет (один и тот же объект, последний — итоговый)
+        """
+        await self.load_categories()
+        batch: List[_PreparedRow] = []
+        for line, row in rows:
+            self.report.processed += 1
+            prepared = self.prepare(line, row)
+            if prepared is not None:
+                batch.append(prepared)
+            if len(batch) >= self.batch_size:
+                await self.flush(batch)
+                batch = []
+                yield self.report
+        if batch:
+            await self.flush(batch)
+        yield self.report
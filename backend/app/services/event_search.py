@@ -0,0 +1,118 @@
+import re
+from typing import Optional
+from sqlalchemy import text, table, column, func, literal_column, select
+
+# Полнотекстовый индекс мероприятий на SQLite FTS5.
+# events_fts — external content таблица поверх events: сам текст хранится
+# только в events, а триггеры поддерживают индекс при INSERT/UPDATE/DELETE
+# из любого места (API, sqladmin, скрипты).
+
+FTS_TABLE = "events_fts"
+
+# Признак того, что индекс создан и может использоваться в get_events.
+# Выставляется в detect_event_search при старте приложения.
+fts_enabled = False
+
+events_fts = table(FTS_TABLE, column("rowid"))
+
+_CREATE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, short_description, location,
+        content='events', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, short_description, location)
+        VALUES (new.id, new.title, new.short_description, new.location);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, short_description, location)
+        VALUES ('delete', old.id, old.title, old.short_description, old.location);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_update
+    AFTER UPDATE OF title, short_description, location ON events BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, short_description, location)
+        VALUES ('delete', old.id, old.title, old.short_description, old.location);
+        INSERT INTO {FTS_TABLE}(rowid, title, short_description, location)
+        VALUES (new.id, new.title, new.short_description, new.location);
+    END
+    """,
+]
+
+async def create_event_search(conn) -> bool:
+    """
+    Создает FTS5-индекс и триггеры синхронизации, если их еще нет
+    (вызывается из миграций схемы). При первом создании индекс заполняется
+    из существующих мероприятий.
+    Возвращает False, если база не SQLite или SQLite собран без FTS5.
+    """
+    if conn.dialect.name != "sqlite":
+        return False
+
+    result = await conn.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE}
+    )
+    exists = result.first() is not None
+
+    try:
+        for statement in _CREATE_STATEMENTS:
+            await conn.execute(text(statement))
+        if not exists:
+            await conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    except Exception as e:
+        print(f"FTS5 index is not available, falling back to LIKE search: {e}")
+        return False
+    return True
+
+async def detect_event_search(conn) -> bool:
+    """
+    Проверяет при старте, можно ли искать через FTS5-индекс, и выставляет
+    fts_enabled. Индекс создает миграция схемы; здесь только пробный запрос
+    к нему, без DDL.
+    """
+    global fts_enabled
+
+    fts_enabled = False
+    if conn.dialect.name != "sqlite":
+        return False
+
+    try:
+        await conn.execute(select(events_fts.c.rowid).limit(0))
+    except Exception as e:
+        print(f"FTS5 index is not available, falling back to LIKE search: {e}")
+        return False
+
+    fts_enabled = True
+    return True
+
+def build_match_query(search: str) -> Optional[str]:
+    """
+    Преобразует пользовательскую строку поиска в выражение FTS5 MATCH:
+    каждое слово ищется как префикс, все слова должны присутствовать.
+    Возвращает None, если в строке нет ни одного слова.
+    """
+    words = re.findall(r"\w+", search)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+def apply_search(query, event_id_column, match: str, rank: bool = True):
+    """
+    Ограничивает запрос мероприятиями, найденными в FTS5-индексе.
+    При rank=True результаты сортируются по релевантности (bm25).
+    """
+    query = query.join(events_fts, events_fts.c.rowid == event_id_column).where(
+        literal_column(FTS_TABLE).op("MATCH")(match)
+    )
+    if rank:
+        query = query.order_by(func.bm25(literal_column(FTS_TABLE)))
+    return query
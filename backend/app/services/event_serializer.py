@@ -0,0 +1,237 @@
+import enum
+import json
+from datetime import date, datetime
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.orm import load_only, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import models
+
+try:
+    import orjson
+except ImportError:  # orjson не обязателен, без него используется стандартный json
+    orjson = None
+
+# Единый сериализатор мероприятий для всех эндпоинтов.
+# Словари содержат «сырые» datetime и Enum: их преобразует dumps() за один
+# проход (orjson делает это на C), либо jsonable_encoder FastAPI, если словарь
+# возвращается из обработчика как есть.
+
+# Скалярные поля мероприятия в порядке вывода
+EVENT_COLUMNS = (
+    "id",
+    "title",
+    "short_description",
+    "full_description",
+    "location",
+    "start_date",
+    "end_date",
+    "max_participants",
+    "current_participants",
+    "status",
+    "event_type",
+    "ticket_price",
+    "image_url",
+    "organizer_id",
+    "created_at",
+    "rejection_reason",
+)
+
+# Связанные объекты, которые выводятся вложенными списками/словарями
+EVENT_RELATIONS = ("organizer", "categories", "images", "participants")
+
+EVENT_FIELDS = frozenset(EVENT_COLUMNS + EVENT_RELATIONS)
+
+def _split_names(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+def parse_event_fields(fields: Optional[str] = None, include: Optional[str] = None) -> FrozenSet[str]:
+    """
+    Разбирает параметры fields= и include= в набор выводимых полей.
+    Без обоих параметров выводится мероприятие целиком. Если задан только
+    fields, связанные объекты не выводятся, пока их не перечислят в include.
+    Поле id выводится всегда.
+    """
+    if fields is None and include is None:
+        return EVENT_FIELDS
+
+    requested = {"id"}
+    if fields is None:
+        requested.update(EVENT_COLUMNS)
+    else:
+        requested.update(_split_names(fields))
+
+    if include is not None:
+        relations = set(_split_names(include))
+        unknown = relations - set(EVENT_RELATIONS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown include: {', '.join(sorted(unknown))}. Allowed: {', '.join(EVENT_RELATIONS)}"
+            )
+        requested.update(relations)
+
+    unknown = requested - EVENT_FIELDS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return frozenset(requested)
+
+def event_load_options(
+    fields: FrozenSet[str] = EVENT_FIELDS,
+    extra_columns: Iterable[str] = (),
+    model=models.Event
+) -> list:
+    """
+    Опции загрузки Event под набор полей: невыбранные колонки не читаются
+    (load_only), невыбранные связи не загружаются вовсе.
+    extra_columns — колонки, нужные обработчику помимо вывода (например, ключ курсора).
+    model — Event или ArchivedEvent (у них одинаковые поля).
+    """
+    columns = set(extra_columns) | {"id"}
+    options = [load_only(*[
+        getattr(model, name) for name in EVENT_COLUMNS if name in fields or name in columns
+    ])]
+    if "organizer" in fields:
+        options.append(joinedload(model.organizer))
+    if "images" in fields:
+        options.append(selectinload(model.images))
+    if "categories" in fields:
+        options.append(selectinload(model.categories))
+    return options
+
+def organizer_to_dict(user: Optional[models.User]) -> Optional[dict]:
+    if user is None:
+        return None
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "full_name": user.full_name,
+        "role": user.role,
+    }
+
+def category_to_dict(category: models.Category) -> dict:
+    return {
+        "id": category.id,
+        "name": category.name,
+        "description": category.description,
+    }
+
+def image_to_dict(image: models.EventImage) -> dict:
+    return {
+        "id": image.id,
+        "event_id": image.event_id,
+        "image_url": image.image_url,
+        "created_at": image.created_at,
+    }
+
+def participant_to_dict(participant) -> dict:
+    return {
+        "user_id": participant.user_id,
+        "event_id": participant.event_id,
+        "ticket_purchased": participant.ticket_purchased,
+    }
+
+@lru_cache(maxsize=64)
+def compile_event_serializer(fields: FrozenSet[str] = EVENT_FIELDS) -> Callable:
+    """
+    Собирает функцию сериализации для заданного набора полей.
+    Список геттеров вычисляется один раз на набор полей, а не на каждое мероприятие.
+    """
+    getters = [(name, attrgetter(name)) for name in EVENT_COLUMNS if name in fields]
+    with_organizer = "organizer" in fields
+    with_categories = "categories" in fields
+    with_images = "images" in fields
+    with_participants = "participants" in fields
+
+    def serialize(event: models.Event, participants: Iterable = ()) -> dict:
+        data = {name: get(event) for name, get in getters}
+        if with_organizer:
+            data["organizer"] = organizer_to_dict(event.organizer)
+        if with_categories:
+            data["categories"] = [category_to_dict(category) for category in event.categories]
+        if with_images:
+            data["images"] = [image_to_dict(image) for image in event.images]
+        if with_participants:
+            data["participants"] = [participant_to_dict(p) for p in participants]
+        return data
+
+    return serialize
+
+def event_to_dict(event: models.Event, participants: Iterable = (), fields: FrozenSet[str] = EVENT_FIELDS) -> dict:
+    """
+    Словарь мероприятия; связанные organizer, categories и images
+    должны быть загружены заранее (joinedload/selectinload)
+    """
+    return compile_event_serializer(fields)(event, participants)
+
+async def load_participants(
+    db: AsyncSession,
+    event_ids: List[int],
+    table=models.event_participants
+) -> Dict[int, list]:
+    """
+    Загружает участников нескольких мероприятий одним запросом
+    и группирует строки event_participants (или архивной table) по event_id
+    """
+    participants_by_event = {event_id: [] for event_id in event_ids}
+    if not participants_by_event:
+        return participants_by_event
+
+    result = await db.execute(
+        select(table).where(table.c.event_id.in_(list(participants_by_event)))
+    )
+    for participant in result.fetchall():
+        participants_by_event[participant.event_id].append(participant)
+    return participants_by_event
+
+async def serialize_events(
+    db: AsyncSession,
+    events: list,
+    fields: FrozenSet[str] = EVENT_FIELDS,
+    participants_table=models.event_participants
+) -> List[dict]:
+    """
+    Преобразует мероприятия в словари; участники всех мероприятий
+    загружаются одним запросом
+    """
+    serialize = compile_event_serializer(fields)
+    if "participants" not in fields:
+        return [serialize(event) for event in events]
+
+    participants_by_event = await load_participants(db, [event.id for event in events], participants_table)
+    return [serialize(event, participants_by_event.get(event.id, ())) for event in events]
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    """
+    Сериализует ответ в JSON-байты; datetime выводятся в ISO 8601, Enum — значением
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+class JSONBytesResponse(Response):
+    """
+    JSON-ответ без прохода jsonable_encoder: принимает готовые байты
+    (например, из кэша) или объект, который сериализуется через dumps()
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
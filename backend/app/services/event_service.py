@@ -3,6 +3,7 @@ from sqlalchemy import select
 from models.models import Event
 from schemas.schemas import EventCreate
 from fastapi import HTTPException, status
+from utils.cache import invalidate_responses
 
 async def create_event(db: AsyncSession, event: EventCreate):
     """
@@ -11,6 +12,7 @@ async def create_event(db: AsyncSession, event: EventCreate):
     db_event = Event(**event.dict())
     db.add(db_event)
     await db.commit()
+    invalidate_responses()
     await db.refresh(db_event)
     return db_event
 
@@ -33,6 +35,7 @@ async def update_event(db: AsyncSession, event_id: int, event: EventCreate):
         setattr(db_event, key, value)
     
     await db.commit()
+    invalidate_responses()
     await db.refresh(db_event)
     return db_event
 
@@ -46,4 +49,5 @@ async def delete_event(db: AsyncSession, event_id: int):
     
     await db.delete(db_event)
     await db.commit()
+    invalidate_responses()
     return True 
\ No newline at end of file
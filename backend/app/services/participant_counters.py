@@ -0,0 +1,130 @@
+import asyncio
+import os
+from sqlalchemy import text, select, update, func, or_
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from models import models
+from utils.log import get_logger
+
+# Счетчик events.current_participants поддерживается триггерами на
+# event_participants: любое добавление или удаление участия (API, удаление
+# пользователя или мероприятия, sqladmin, скрипты) меняет счетчик в той же
+# транзакции. Обработчики не изменяют счетчик сами.
+# reconcile_participant_counters исправляет расхождения, накопившиеся
+# до появления триггеров или после ручных правок events.
+
+logger = get_logger(__name__)
+
+RECONCILE_BATCH_SIZE = int(os.environ.get("PARTICIPANTS_RECONCILE_BATCH_SIZE", "5000"))
+RECONCILE_INTERVAL = float(os.environ.get("PARTICIPANTS_RECONCILE_INTERVAL", "3600"))
+
+_SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS event_participants_count_insert
+    AFTER INSERT ON event_participants BEGIN
+        UPDATE events SET current_participants = COALESCE(current_participants, 0) + 1
+        WHERE id = new.event_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_participants_count_delete
+    AFTER DELETE ON event_participants BEGIN
+        UPDATE events SET current_participants = MAX(COALESCE(current_participants, 0) - 1, 0)
+        WHERE id = old.event_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_participants_count_update
+    AFTER UPDATE OF event_id ON event_participants
+    WHEN old.event_id IS NOT new.event_id BEGIN
+        UPDATE events SET current_participants = MAX(COALESCE(current_participants, 0) - 1, 0)
+        WHERE id = old.event_id;
+        UPDATE events SET current_participants = COALESCE(current_participants, 0) + 1
+        WHERE id = new.event_id;
+    END
+    """,
+]
+
+_POSTGRESQL_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION event_participants_count() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE events SET current_participants = COALESCE(current_participants, 0) + 1
+            WHERE id = NEW.event_id;
+        END IF;
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE events SET current_participants = GREATEST(COALESCE(current_participants, 0) - 1, 0)
+            WHERE id = OLD.event_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS event_participants_count ON event_participants",
+    """
+    CREATE TRIGGER event_participants_count
+    AFTER INSERT OR DELETE OR UPDATE OF event_id ON event_participants
+    FOR EACH ROW EXECUTE FUNCTION event_participants_count()
+    """,
+]
+
+async def ensure_participant_counters(conn: AsyncConnection) -> bool:
+    """
+    Создает триггеры счетчика участников. Возвращает False для СУБД,
+    для которых триггеры не описаны (счетчик тогда чинит только сверка).
+    """
+    statements = {
+        "sqlite": _SQLITE_TRIGGERS,
+        "postgresql": _POSTGRESQL_TRIGGERS,
+    }.get(conn.dialect.name)
+    if statements is None:
+        return False
+    for statement in statements:
+        await conn.execute(text(statement))
+    return True
+
+async def reconcile_participant_counters(engine: AsyncEngine, batch_size: int = RECONCILE_BATCH_SIZE) -> int:
+    """
+    Пересчитывает current_participants одним UPDATE с коррелированным
+    подзапросом на каждую пачку id (короткие транзакции вместо блокировки
+    всей таблицы). Изменяются только расходящиеся строки.
+    Возвращает число исправленных мероприятий.
+    """
+    participants = models.event_participants
+    actual = (
+        select(func.count())
+        .where(participants.c.event_id == models.Event.id)
+        .scalar_subquery()
+    )
+
+    async with engine.connect() as conn:
+        max_id = (await conn.execute(select(func.max(models.Event.id)))).scalar() or 0
+
+    fixed = 0
+    for low in range(1, max_id + 1, batch_size):
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                update(models.Event)
+                .where(
+                    models.Event.id.between(low, low + batch_size - 1),
+                    or_(models.Event.current_participants.is_(None),
+                        models.Event.current_participants != actual)
+                )
+                .values(current_participants=actual)
+                .execution_options(synchronize_session=False)
+            )
+            fixed += result.rowcount
+    return fixed
+
+async def reconcile_periodically(engine: AsyncEngine, interval: float = RECONCILE_INTERVAL) -> None:
+    """
+    Фоновая сверка счетчиков; запускается задачей при старте приложения
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            fixed = await reconcile_participant_counters(engine)
+            if fixed:
+                logger.warning("Participant counters repaired for %d events", fixed)
+        except Exception:
+            logger.exception("Participant counter reconciliation failed")
@@ -0,0 +1,452 @@
+from collections import namedtuple
+from datetime import datetime
+from typing import List
+from sqlalchemy import (
+    Boolean, Column, DateTime, Enum, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text,
+    func, inspect, select, text, update
+)
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateIndex, CreateTable
+from services.event_search import FTS_TABLE, create_event_search
+from services.participant_counters import ensure_participant_counters, reconcile_participant_counters
+
+# Версионированные миграции схемы.
+# Применённые миграции записываются в schema_migrations; при старте читается
+# только максимальная версия, и если она совпадает с последней миграцией,
+# схема не проверяется вовсе (create_all и отражение таблиц не выполняются).
+# Новая миграция добавляется в конец MIGRATIONS со следующим номером;
+# она должна быть идемпотентной, так как несколько воркеров могут
+# запуститься одновременно.
+# Таблицы и индексы каждая миграция описывает своими замороженными
+# определениями, а не моделями из models.py: иначе смысл уже примененных
+# версий менялся бы вместе с моделями. Изменение схемы — новая миграция
+# и соответствующая правка моделей.
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+Migration = namedtuple("Migration", "version name upgrade")
+
+async def create_index_online(engine: AsyncEngine, index: Index) -> None:
+    """
+    Создает индекс, если его нет. Индекс, объявленный с
+    postgresql_concurrently=True, в PostgreSQL строится CONCURRENTLY вне
+    транзакции, без блокировки записи в таблицу; SQLite не умеет строить
+    индексы конкурентно, поэтому индекс строится в короткой транзакции.
+    """
+    ddl = CreateIndex(index, if_not_exists=True)
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as conn:
+            autocommit = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await autocommit.execute(ddl)
+        return
+
+    async with engine.begin() as conn:
+        await conn.execute(ddl)
+
+# Перечисления хранятся по именам членов (как Enum(<класс>) в моделях)
+def _event_type() -> Enum:
+    return Enum("FREE", "PAID", name="eventtype")
+
+def _event_status() -> Enum:
+    return Enum("PENDING", "APPROVED", "REJECTED", name="eventstatus")
+
+def _event_columns() -> List[Column]:
+    return [
+        Column("id", Integer, primary_key=True, index=True),
+        Column("title", String, index=True),
+        Column("short_description", String),
+        Column("full_description", Text),
+        Column("location", String),
+        Column("start_date", DateTime),
+        Column("end_date", DateTime),
+        Column("created_at", DateTime),
+        Column("max_participants", Integer),
+        Column("current_participants", Integer),
+        Column("image_url", String),
+        Column("event_type", _event_type()),
+        Column("ticket_price", Float, nullable=True),
+        Column("status", _event_status()),
+        Column("rejection_reason", String, nullable=True),
+        Column("organizer_id", Integer, ForeignKey("users.id")),
+    ]
+
+# Миграция 1: схема на момент появления миграций, без индексов горячих путей
+initial_metadata = MetaData()
+
+Table(
+    "users",
+    initial_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("username", String, unique=True, index=True),
+    Column("hashed_password", String),
+    Column("full_name", String),
+    Column("role", Enum("VISITOR", "ORGANIZER", "ADMIN", name="userrole")),
+    Column("created_at", DateTime),
+    Column("is_active", Boolean),
+)
+Table("events", initial_metadata, *_event_columns())
+Table(
+    "categories",
+    initial_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, index=True),
+    Column("description", String),
+)
+Table(
+    "event_images",
+    initial_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("event_id", Integer, ForeignKey("events.id")),
+    Column("image_url", String),
+    Column("created_at", DateTime),
+)
+Table(
+    "event_participants",
+    initial_metadata,
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("event_id", Integer, ForeignKey("events.id")),
+    Column("ticket_purchased", Boolean),
+    Column("created_at", DateTime),
+)
+Table(
+    "event_categories",
+    initial_metadata,
+    Column("event_id", Integer, ForeignKey("events.id")),
+    Column("category_id", Integer, ForeignKey("categories.id")),
+)
+Table(
+    "revoked_tokens",
+    initial_metadata,
+    Column("jti", String, primary_key=True),
+    Column("expires_at", DateTime, nullable=False, index=True),
+)
+
+async def _initial_schema(engine: AsyncEngine) -> None:
+    # Для баз, созданных до миграций, create_all добавит только недостающие таблицы
+    async with engine.begin() as conn:
+        await conn.run_sync(initial_metadata.create_all)
+
+        # Бывшие scripts/add_image_url.py и database/migrations/add_image_url.py
+        columns = await conn.run_sync(
+            lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns("events")}
+        )
+        if "image_url" not in columns:
+            await conn.execute(text("ALTER TABLE events ADD COLUMN image_url VARCHAR"))
+
+# Миграция 2: индексы горячих путей. Таблицы описаны только нужными колонками
+hot_path_metadata = MetaData()
+
+def _hot_path_indexes_list() -> List[Index]:
+    events = Table(
+        "events", hot_path_metadata,
+        Column("id", Integer), Column("start_date", DateTime), Column("end_date", DateTime),
+        Column("status", String), Column("organizer_id", Integer),
+    )
+    participants = Table("event_participants", hot_path_metadata, Column("event_id", Integer), Column("user_id", Integer))
+    categories = Table("event_categories", hot_path_metadata, Column("event_id", Integer), Column("category_id", Integer))
+    images = Table("event_images", hot_path_metadata, Column("event_id", Integer))
+    return [
+        Index("ix_events_start_date_id", events.c.start_date, events.c.id, postgresql_concurrently=True),
+        Index("ix_events_end_date_start_date", events.c.end_date, events.c.start_date, postgresql_concurrently=True),
+        Index("ix_events_status_start_date", events.c.status, events.c.start_date, postgresql_concurrently=True),
+        Index(
+            "ix_events_approved_start_date",
+            events.c.start_date, events.c.id,
+            sqlite_where=text("status = 'APPROVED'"),
+            postgresql_where=text("status = 'APPROVED'"),
+            postgresql_concurrently=True,
+        ),
+        Index("ix_events_organizer_id_start_date", events.c.organizer_id, events.c.start_date, postgresql_concurrently=True),
+        Index(
+            "uq_event_participants_event_user",
+            participants.c.event_id, participants.c.user_id,
+            unique=True, postgresql_concurrently=True,
+        ),
+        Index("ix_event_participants_user_event", participants.c.user_id, participants.c.event_id, postgresql_concurrently=True),
+        Index("ix_event_categories_event_category", categories.c.event_id, categories.c.category_id, postgresql_concurrently=True),
+        Index("ix_event_categories_category_event", categories.c.category_id, categories.c.event_id, postgresql_concurrently=True),
+        Index("ix_event_images_event_id", images.c.event_id, postgresql_concurrently=True),
+    ]
+
+HOT_PATH_INDEXES = _hot_path_indexes_list()
+
+async def _hot_path_indexes(engine: AsyncEngine) -> None:
+    # Перед созданием уникального индекса удаляем повторные записи участия,
+    # оставляя самую раннюю из каждой пары (event_id, user_id)
+    row_id = "ctid" if engine.dialect.name == "postgresql" else "rowid"
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            f"DELETE FROM event_participants WHERE {row_id} NOT IN ("
+            f"SELECT MIN({row_id}) FROM event_participants GROUP BY event_id, user_id)"
+        ))
+
+    for index in HOT_PATH_INDEXES:
+        await create_index_online(engine, index)
+
+    # Обновляем статистику, чтобы планировщик начал использовать новые индексы
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+async def _participant_counter_triggers(engine: AsyncEngine) -> None:
+    # Счетчик участников ведут триггеры; сразу исправляем накопленные расхождения
+    async with engine.begin() as conn:
+        await ensure_participant_counters(conn)
+    await reconcile_participant_counters(engine)
+
+# Миграция 4: таблицы архива завершившихся мероприятий (services/event_archive.py)
+archive_metadata = MetaData()
+
+Table(
+    "archived_events",
+    archive_metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("title", String),
+    Column("short_description", String),
+    Column("full_description", Text),
+    Column("location", String),
+    Column("start_date", DateTime),
+    Column("end_date", DateTime),
+    Column("created_at", DateTime),
+    Column("max_participants", Integer),
+    Column("current_participants", Integer),
+    Column("image_url", String),
+    Column("event_type", _event_type()),
+    Column("ticket_price", Float, nullable=True),
+    Column("status", _event_status()),
+    Column("rejection_reason", String, nullable=True),
+    Column("organizer_id", Integer),
+    Column("archived_at", DateTime),
+    Index("ix_archived_events_start_date_id", "start_date", "id"),
+    Index("ix_archived_events_organizer_id_start_date", "organizer_id", "start_date"),
+)
+Table(
+    "archived_event_participants",
+    archive_metadata,
+    Column("user_id", Integer),
+    Column("event_id", Integer, ForeignKey("archived_events.id")),
+    Column("ticket_purchased", Boolean),
+    Column("created_at", DateTime),
+    Index("ix_archived_event_participants_event_user", "event_id", "user_id"),
+    Index("ix_archived_event_participants_user_event", "user_id", "event_id"),
+)
+Table(
+    "archived_event_categories",
+    archive_metadata,
+    Column("event_id", Integer, ForeignKey("archived_events.id")),
+    Column("category_id", Integer),
+    Index("ix_archived_event_categories_event_category", "event_id", "category_id"),
+)
+Table(
+    "archived_event_images",
+    archive_metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("event_id", Integer, ForeignKey("archived_events.id"), index=True),
+    Column("image_url", String),
+    Column("created_at", DateTime),
+)
+
+async def _event_archive(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(archive_metadata.create_all)
+
+# Миграция 5: events и event_images с AUTOINCREMENT вместе со всеми их
+# индексами; остальные таблицы описаны только колонками, нужными для
+# перенумерации и внешних ключей
+autoincrement_metadata = MetaData()
+
+Table("users", autoincrement_metadata, Column("id", Integer, primary_key=True))
+autoincrement_events = Table(
+    "events",
+    autoincrement_metadata,
+    *_event_columns(),
+    Index("ix_events_start_date_id", "start_date", "id"),
+    Index("ix_events_end_date_start_date", "end_date", "start_date"),
+    Index("ix_events_status_start_date", "status", "start_date"),
+    Index(
+        "ix_events_approved_start_date",
+        "start_date", "id",
+        sqlite_where=text("status = 'APPROVED'"),
+    ),
+    Index("ix_events_organizer_id_start_date", "organizer_id", "start_date"),
+    sqlite_autoincrement=True,
+)
+autoincrement_event_images = Table(
+    "event_images",
+    autoincrement_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("event_id", Integer, ForeignKey("events.id"), index=True),
+    Column("image_url", String),
+    Column("created_at", DateTime),
+    sqlite_autoincrement=True,
+)
+autoincrement_archived_events = Table("archived_events", autoincrement_metadata, Column("id", Integer))
+autoincrement_archived_event_images = Table("archived_event_images", autoincrement_metadata, Column("id", Integer))
+autoincrement_event_participants = Table("event_participants", autoincrement_metadata, Column("event_id", Integer))
+autoincrement_event_categories = Table("event_categories", autoincrement_metadata, Column("event_id", Integer))
+
+def _rebuild_with_autoincrement(sync_conn, table: Table, archive_table: Table, references: List[Table]) -> bool:
+    """
+    Пересоздает таблицу SQLite с AUTOINCREMENT (ALTER TABLE его не добавляет).
+    Строки, чьи id уже заняты в архиве, получают новые id вместе со ссылками
+    на них; счетчик sqlite_sequence ставится выше id обеих таблиц.
+    Возвращает True, если строки пришлось перенумеровать.
+    """
+    sql = sync_conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": table.name}
+    ).scalar()
+    if "AUTOINCREMENT" in sql.upper():
+        return False
+
+    top = max(
+        sync_conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar(),
+        sync_conn.execute(select(func.coalesce(func.max(archive_table.c.id), 0))).scalar(),
+    )
+    archived_ids = select(archive_table.c.id)
+    renumbered = sync_conn.execute(update(table).where(table.c.id.in_(archived_ids)).values(id=table.c.id + top)).rowcount
+    if renumbered:
+        for reference in references:
+            sync_conn.execute(
+                update(reference).where(reference.c.event_id.in_(archived_ids))
+                .values(event_id=reference.c.event_id + top)
+            )
+        top = sync_conn.execute(select(func.max(table.c.id))).scalar()
+
+    # Новая таблица создается рядом и подменяет старую: индексы строятся
+    # заново по замороженному определению, триггеры на самой таблице удаляются вместе с ней
+    columns = ", ".join(
+        column["name"] for column in inspect(sync_conn).get_columns(table.name) if column["name"] in table.c
+    )
+    rebuilt = f"{table.name}_rebuild"
+    ddl = str(CreateTable(table).compile(dialect=sync_conn.dialect))
+    sync_conn.execute(text(ddl.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {rebuilt} ", 1)))
+    sync_conn.execute(text(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {table.name}"))
+    sync_conn.execute(text(f"DROP TABLE {table.name}"))
+    sync_conn.execute(text(f"ALTER TABLE {rebuilt} RENAME TO {table.name}"))
+    for index in table.indexes:
+        index.create(sync_conn)
+
+    sync_conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table.name})
+    sync_conn.execute(
+        text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+        {"name": table.name, "seq": top}
+    )
+    return renumbered > 0
+
+async def _sqlite_autoincrement(engine: AsyncEngine) -> None:
+    # Архив хранит исходные id, а SQLite без AUTOINCREMENT выдает новой
+    # строке max(id) + 1, то есть повторно использует id перенесенных строк.
+    # PostgreSQL берет id из последовательности и повторов не дает.
+    if engine.dialect.name != "sqlite":
+        return
+
+    async with engine.connect() as conn:
+        # foreign_keys переключается только вне транзакции: иначе DROP TABLE
+        # удалил бы ссылающиеся строки. legacy_alter_table оставляет ссылки
+        # на events в триггерах и внешних ключах как есть при переименовании.
+        foreign_keys = (await conn.exec_driver_sql("PRAGMA foreign_keys")).scalar()
+        await conn.exec_driver_sql("PRAGMA foreign_keys = OFF")
+        await conn.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+        await conn.commit()
+        try:
+            async with conn.begin():
+                fts_exists = (await conn.execute(
+                    text("SELECT name FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": FTS_TABLE}
+                )).first() is not None
+                # Базы, работавшие без foreign_keys, могут содержать висячие
+                # ссылки; ошибкой считаются только появившиеся при пересоздании
+                violations_before = set((await conn.exec_driver_sql("PRAGMA foreign_key_check")).all())
+                renumbered = await conn.run_sync(
+                    _rebuild_with_autoincrement,
+                    autoincrement_events,
+                    autoincrement_archived_events,
+                    [autoincrement_event_participants, autoincrement_event_categories, autoincrement_event_images],
+                )
+                renumbered |= await conn.run_sync(
+                    _rebuild_with_autoincrement,
+                    autoincrement_event_images,
+                    autoincrement_archived_event_images,
+                    [],
+                )
+                # Триггеры полнотекстового индекса удалены вместе со старой events;
+                # сам индекс, если его еще нет, создаст миграция 6
+                if fts_exists and await create_event_search(conn) and renumbered:
+                    await conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                violations = set((await conn.exec_driver_sql("PRAGMA foreign_key_check")).all()) - violations_before
+                if violations:
+                    raise RuntimeError(f"Foreign key violations after rebuild: {sorted(violations)[:5]}")
+        finally:
+            await conn.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+            await conn.exec_driver_sql(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+            await conn.commit()
+
+    if renumbered:
+        # Перенумерация участий меняла счетчики через триггеры
+        await reconcile_participant_counters(engine)
+
+async def _event_search(engine: AsyncEngine) -> None:
+    # Полнотекстовый индекс мероприятий (services/event_search.py); на
+    # PostgreSQL и SQLite без FTS5 поиск остается на LIKE
+    async with engine.begin() as conn:
+        await create_event_search(conn)
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial_schema", _initial_schema),
+    Migration(2, "hot_path_indexes", _hot_path_indexes),
+    Migration(3, "participant_counter_triggers", _participant_counter_triggers),
+    Migration(4, "event_archive", _event_archive),
+    Migration(5, "sqlite_autoincrement", _sqlite_autoincrement),
+    Migration(6, "event_search", _event_search),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+async def get_schema_version(engine: AsyncEngine) -> int:
+    """
+    Последняя примененная миграция; 0, если таблицы версий еще нет
+    """
+    async with engine.connect() as conn:
+        try:
+            version = (await conn.execute(select(func.max(schema_migrations.c.version)))).scalar()
+        except (OperationalError, ProgrammingError):
+            return 0
+    return version or 0
+
+async def run_migrations(engine: AsyncEngine) -> List[str]:
+    """
+    Применяет миграции новее текущей версии схемы по порядку.
+    Возвращает имена примененных миграций.
+    """
+    version = await get_schema_version(engine)
+    if version >= LATEST_VERSION:
+        return []
+
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: schema_migrations.create(sync_conn, checkfirst=True))
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        await migration.upgrade(engine)
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(schema_migrations.insert().values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Миграцию параллельно применил другой воркер
+            pass
+        applied.append(migration.name)
+    return applied
@@ -4,7 +4,7 @@ from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from models.models import User
 from schemas.schemas import UserCreate
-from utils.auth import get_password_hash, verify_password
+from utils.password import get_password_hash_async, verify_and_update_password_async
 
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
     # Проверяем, существует ли пользователь с таким email
@@ -16,7 +16,7 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
         )
     
     # Создаем нового пользователя
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
@@ -40,11 +40,22 @@ async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     result = await db.execute(select(User).where(User.email == email))
     return result.scalar_one_or_none()
 
+async def check_password(db: AsyncSession, user: User, password: str) -> bool:
+    """
+    Проверяет пароль пользователя; хеш, не соответствующий текущей
+    стоимости bcrypt, перехешируется и сохраняется
+    """
+    valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if valid and new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return valid
+
 async def authenticate_user(db: AsyncSession, email: str, password: str) -> User | None:
     user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await check_password(db, user, password):
         return None
     return user
 
@@ -1,18 +1,26 @@
+import hashlib
+import os
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, List, Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from database import get_db
-from sqlalchemy import select
+from database import get_db, AsyncSessionLocal
+from sqlalchemy import select, inspect
+from sqlalchemy.orm import make_transient_to_detached
 from models.models import User
 from .password import verify_password, get_password_hash
+from .cache import TTLCache
+from .revocation import denylist
 
 # Настройки JWT
 SECRET_KEY = "your-secret-key-here"  # В продакшене использовать безопасный ключ из переменных окружения
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
@@ -22,10 +30,136 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # jti позволяет отозвать конкретный токен (utils.revocation)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "access"})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token(email: str) -> str:
+    """
+    Долгоживущий токен для получения новых access-токенов без проверки пароля
+    """
+    to_encode = {
+        "sub": email,
+        "exp": datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        "jti": uuid.uuid4().hex,
+        "type": "refresh",
+    }
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+# Кэш проверенных токенов: подпись и срок действия токена проверяются
+# jwt.decode один раз, дальше до exp используются сохраненные claims.
+# Ключ — SHA-256 токена, чтобы сами токены не хранились в памяти.
+token_cache = TTLCache(
+    "tokens",
+    maxsize=int(os.environ.get("TOKEN_CACHE_SIZE", "4096")),
+    ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+# Проверки отзыва: функции (token_hash, claims) -> bool, вызываются на каждый
+# запрос, в том числе при попадании в кэш
+_revocation_checks: List[Callable[[bytes, dict], bool]] = []
+
+def token_hash(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+def register_revocation_check(check: Callable[[bytes, dict], bool]) -> None:
+    """
+    Подключает проверку отзыва токенов (например, по черному списку)
+    """
+    _revocation_checks.append(check)
+
+def revoke_token(token: str) -> None:
+    """
+    Удаляет токен из кэша проверенных токенов; сам отказ в доступе
+    обеспечивают проверки из register_revocation_check
+    """
+    token_cache.pop(token_hash(token))
+
+def decode_token(token: str, token_type: str = "access") -> Optional[dict]:
+    """
+    Claims токена или None, если токен недействителен, просрочен, отозван
+    или другого типа (refresh-токен не принимается вместо access)
+    """
+    key = token_hash(token)
+    claims = token_cache.get(key)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+        exp = claims.get("exp")
+        # Запись живет не дольше самого токена
+        token_cache.set(key, claims, ttl=exp - time.time() if exp is not None else None)
+
+    # Токены без type выпущены до появления refresh-токенов и считаются access
+    if claims.get("type", "access") != token_type:
+        return None
+    for check in _revocation_checks:
+        if check(key, claims):
+            return None
+    return claims
+
+register_revocation_check(denylist.check)
+
+# Кэш пользователей по subject токена (email): аутентифицированные запросы
+# не читают users из базы, пока запись в кэше жива. Кэш локален для процесса,
+# поэтому TTL ограничивает устаревание при изменениях из других воркеров.
+user_cache = TTLCache(
+    "users",
+    maxsize=int(os.environ.get("USER_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("USER_CACHE_TTL", "60")),
+)
+
+def _user_snapshot(user: User) -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+def cache_user(user: User) -> None:
+    user_cache.set(user.email, _user_snapshot(user))
+
+def get_cached_user(email: str) -> Optional[User]:
+    """
+    Пользователь из кэша. Каждый вызов возвращает новый объект
+    в состоянии detached, поэтому запросы не делят один экземпляр,
+    а добавление его в сессию не приведет к INSERT.
+    """
+    values = user_cache.get(email)
+    if values is None:
+        return None
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+def invalidate_user(*emails: Optional[str]) -> None:
+    """
+    Удаляет пользователей из кэша; без аргументов очищает кэш целиком.
+    Вызывается при изменении, удалении пользователя и смене роли.
+    """
+    if not emails:
+        user_cache.clear()
+        return
+    for email in emails:
+        if email:
+            user_cache.pop(email)
+
+async def resolve_user(email: str, db: Optional[AsyncSession] = None) -> Optional[User]:
+    """
+    Находит пользователя по email сначала в кэше, затем в базе.
+    Если сессия не передана, она открывается только при промахе кэша.
+    """
+    user = get_cached_user(email)
+    if user is not None:
+        return user
+
+    if db is None:
+        async with AsyncSessionLocal() as session:
+            user = await get_user_by_email(session, email)
+    else:
+        user = await get_user_by_email(db, email)
+    if user is not None:
+        cache_user(user)
+    return user
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
@@ -35,29 +169,23 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+    payload = decode_token(token)
+    email = payload.get("sub") if payload is not None else None
+    if email is None:
         raise credentials_exception
 
-    user = await get_user_by_email(db, email)
+    user = await resolve_user(email, db)
     if user is None:
         raise credentials_exception
     return user
 
-async def verify_token(token: str, db: AsyncSession) -> Optional[User]:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-    except JWTError:
+async def verify_token(token: str, db: Optional[AsyncSession] = None) -> Optional[User]:
+    payload = decode_token(token)
+    email = payload.get("sub") if payload is not None else None
+    if email is None:
         return None
 
-    return await get_user_by_email(db, email)
+    return await resolve_user(email, db)
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     result = await db.execute(select(User).where(User.email == email))
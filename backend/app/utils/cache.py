@@ -0,0 +1,126 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+# Внутрипроцессные кэши с вытеснением по LRU и TTL.
+# Все созданные кэши регистрируются в _registry, чтобы их метрики
+# можно было отдать одним эндпоинтом (/debug/cache).
+
+_registry: List["TTLCache"] = []
+
+class TTLCache:
+    """
+    Ограниченный по размеру кэш: самые давно использованные записи
+    вытесняются при переполнении, просроченные — при обращении.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        _registry.append(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+class VersionedCache(TTLCache):
+    """
+    Кэш ответов, который сбрасывается увеличением версии.
+    Каждая операция записи вызывает invalidate(); значение, вычисленное
+    до записи, не попадет в кэш, так как set() проверяет версию,
+    прочитанную перед запросом к базе.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        super().__init__(name, maxsize, ttl)
+        self.version = 0
+        self.invalidations = 0
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None, ttl: Optional[float] = None) -> None:
+        if version is not None and version != self.version:
+            return
+        super().set(key, value, ttl)
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self.invalidations += 1
+        self.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        data = super().stats()
+        data.update({"version": self.version, "invalidations": self.invalidations})
+        return data
+
+def cache_stats() -> List[Dict[str, Any]]:
+    """
+    Метрики всех зарегистрированных кэшей
+    """
+    return [cache.stats() for cache in _registry]
+
+# Кэш публичных ответов со списками мероприятий и категорий
+response_cache = VersionedCache(
+    "responses",
+    maxsize=int(os.environ.get("RESPONSE_CACHE_SIZE", "512")),
+    ttl=float(os.environ.get("RESPONSE_CACHE_TTL", "30")),
+)
+
+def invalidate_responses() -> None:
+    """
+    Сбрасывает кэш публичных ответов; вызывается после каждой записи
+    мероприятий, участников, категорий и пользователей
+    """
+    response_cache.invalidate()
@@ -0,0 +1,96 @@
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Единая настройка логирования приложения.
+#
+# LOG_LEVEL                 — уровень по умолчанию (INFO)
+# LOG_LEVELS                — уровни модулей: "routers.events=DEBUG,routers.auth=WARNING"
+# LOG_DEBUG_SAMPLE_RATE     — доля запросов, для которых пишутся DEBUG-записи (0..1)
+#
+# Записи уходят в очередь, а в stderr их пишет отдельный поток (QueueListener),
+# поэтому обработчики запросов не блокируются на выводе. Каждая запись
+# содержит request_id текущего запроса.
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+debug_sampled_var: ContextVar[bool] = ContextVar("debug_sampled", default=True)
+
+DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
+LOG_FORMAT = "%(asctime)s level=%(levelname)s logger=%(name)s request_id=%(request_id)s %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class RequestContextFilter(logging.Filter):
+    """
+    Добавляет request_id и отбрасывает DEBUG-записи запросов, не попавших в выборку
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        if record.levelno <= logging.DEBUG and not debug_sampled_var.get():
+            return False
+        return True
+
+def _parse_levels(value: str) -> Dict[str, str]:
+    levels = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def configure_logging() -> None:
+    """
+    Настраивает корневой логгер; повторный вызов заменяет прежнюю настройку
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+    for name, level in _parse_levels(os.environ.get("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging() -> None:
+    """
+    Дописывает оставшиеся в очереди записи
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def start_request(request_id: Optional[str] = None) -> str:
+    """
+    Привязывает request_id к текущему контексту и решает,
+    попадает ли запрос в выборку DEBUG-трассировки
+    """
+    request_id = request_id or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    debug_sampled_var.set(DEBUG_SAMPLE_RATE >= 1.0 or random.random() < DEBUG_SAMPLE_RATE)
+    return request_id
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
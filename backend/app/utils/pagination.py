@@ -0,0 +1,67 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+# Курсорная (keyset) пагинация: курсор хранит ключ сортировки последней
+# строки страницы, и следующая страница начинается с условия WHERE
+# вместо OFFSET, поэтому глубокие страницы читаются так же быстро, как первая.
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Кодирует ключ сортировки последней строки в непрозрачную строку
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Декодирует курсор, созданный encode_cursor
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+def after_id(cursor: str, id_column):
+    """
+    Условие для страницы после курсора при сортировке по id
+    """
+    (last_id,) = decode_cursor(cursor, 1)
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return id_column > last_id
+
+def after_date_id(cursor: str, date_column, id_column):
+    """
+    Условие для страницы после курсора при сортировке по (date_column, id).
+    Запрос должен сортироваться по date_column NULLS FIRST, id.
+    """
+    last_date, last_id = decode_cursor(cursor, 2)
+    try:
+        last_date: Optional[datetime] = datetime.fromisoformat(last_date) if last_date is not None else None
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if last_date is None:
+        return or_(
+            and_(date_column.is_(None), id_column > last_id),
+            date_column.isnot(None)
+        )
+    return or_(
+        date_column > last_date,
+        and_(date_column == last_date, id_column > last_id)
+    )
@@ -1,4 +1,13 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 from passlib.context import CryptContext
+from utils.log import get_logger
+
+logger = get_logger(__name__)
 
 # Настройка хеширования паролей с явным указанием параметров
 pwd_context = CryptContext(
@@ -15,15 +24,164 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
         return pwd_context.verify(plain_password, hashed_password)
     except Exception as e:
-        print(f"Ошибка при проверке пароля: {e}")
+        logger.warning("Password verification failed: %s", e)
         return False
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Проверяет пароль и, если хеш не соответствует текущей политике
+    (needs_update), возвращает новый хеш того же пароля
+    """
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception as e:
+        logger.warning("Password verification failed: %s", e)
+        return False, None
+
 def get_password_hash(password: str) -> str:
     """
     Создает хеш пароля
     """
     try:
         return pwd_context.hash(password)
-    except Exception as e:
-        print(f"Ошибка при хешировании пароля: {e}")
-        raise 
\ No newline at end of file
+    except Exception:
+        logger.exception("Password hashing failed")
+        raise
+
+# bcrypt занимает процессор на сотни миллисекунд, поэтому в асинхронных
+# обработчиках хеширование и проверка выполняются в ограниченном пуле потоков
+# (bcrypt отпускает GIL), а не в цикле событий. Размер пула ограничивает
+# число одновременных вычислений, остальные запросы ждут в очереди.
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_stats_lock = threading.Lock()
+_stats = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "max_queued": 0,
+    "total_wait_ms": 0.0,
+    "total_run_ms": 0.0,
+}
+
+def _run_tracked(func, submitted_at: float, *args):
+    started_at = time.perf_counter()
+    with _stats_lock:
+        _stats["queued"] -= 1
+        _stats["running"] += 1
+        _stats["total_wait_ms"] += (started_at - submitted_at) * 1000
+    try:
+        return func(*args)
+    finally:
+        with _stats_lock:
+            _stats["running"] -= 1
+            _stats["completed"] += 1
+            _stats["total_run_ms"] += (time.perf_counter() - started_at) * 1000
+
+async def _run_in_pool(func, *args):
+    with _stats_lock:
+        _stats["queued"] += 1
+        _stats["max_queued"] = max(_stats["max_queued"], _stats["queued"])
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, _run_tracked, func, time.perf_counter(), *args)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Проверяет пароль в пуле потоков, не блокируя цикл событий
+    """
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    verify_and_update_password в пуле потоков
+    """
+    return await _run_in_pool(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Создает хеш пароля в пуле потоков, не блокируя цикл событий
+    """
+    return await _run_in_pool(get_password_hash, password)
+
+def password_pool_stats() -> dict:
+    """
+    Метрики пула хеширования: глубина очереди, занятые потоки, среднее ожидание
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    completed = stats["completed"]
+    stats["workers"] = PASSWORD_HASH_WORKERS
+    stats["hash_policy"] = dict(_policy)
+    stats["avg_wait_ms"] = round(stats["total_wait_ms"] / completed, 2) if completed else 0.0
+    stats["avg_run_ms"] = round(stats["total_run_ms"] / completed, 2) if completed else 0.0
+    return stats
+
+# Стоимость bcrypt подбирается при старте под бюджет задержки
+# PASSWORD_HASH_BUDGET_MS: время хеширования измеряется на дешевой
+# стоимости и экстраполируется (каждый раунд удваивает работу).
+# BCRYPT_ROUNDS задает стоимость явно и отключает калибровку.
+# Стоимость не опускается ниже BCRYPT_MIN_ROUNDS (12 — прежняя фиксированная
+# стоимость), и при входе перехешируются только хеши дешевле текущей:
+# медленный сервер не должен ослаблять уже созданные хеши.
+PASSWORD_HASH_BUDGET_MS = float(os.environ.get("PASSWORD_HASH_BUDGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = int(os.environ.get("BCRYPT_MIN_ROUNDS", "12"))
+BCRYPT_MAX_ROUNDS = int(os.environ.get("BCRYPT_MAX_ROUNDS", "15"))
+# Стоимость, на которой измеряется время хеширования при калибровке
+BCRYPT_CALIBRATION_ROUNDS = 8
+
+_policy = {
+    "rounds": 12,
+    "budget_ms": PASSWORD_HASH_BUDGET_MS,
+    "base_rounds": None,
+    "base_ms": None,
+    "calibrated": False,
+}
+
+def _measure_hash_ms(rounds: int, samples: int = 3) -> float:
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    best = float("inf")
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        handler.hash("calibration")
+        best = min(best, time.perf_counter() - started_at)
+    return best * 1000
+
+def choose_bcrypt_rounds(base_ms: float, base_rounds: int, budget_ms: float,
+                         min_rounds: int = BCRYPT_MIN_ROUNDS, max_rounds: int = BCRYPT_MAX_ROUNDS) -> int:
+    """
+    Наибольшая стоимость, при которой оценка времени хеширования
+    укладывается в бюджет; не меньше min_rounds
+    """
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - base_rounds) <= budget_ms:
+        rounds += 1
+    return rounds
+
+def apply_hash_policy(rounds: int) -> None:
+    # bcrypt__rounds задает сразу и нижнюю, и верхнюю границу, поэтому
+    # заменяется на default_rounds: без верхней границы более дорогие
+    # хеши не перехешируются
+    settings = pwd_context.to_dict()
+    settings.pop("bcrypt__rounds", None)
+    settings.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+    pwd_context.load(settings)
+    _policy["rounds"] = rounds
+
+async def calibrate_password_cost() -> dict:
+    """
+    Выбирает стоимость bcrypt под бюджет задержки и применяет ее;
+    вызывается один раз при старте приложения
+    """
+    fixed_rounds = os.environ.get("BCRYPT_ROUNDS")
+    if fixed_rounds:
+        rounds = max(int(fixed_rounds), BCRYPT_MIN_ROUNDS)
+    else:
+        base_ms = await _run_in_pool(_measure_hash_ms, BCRYPT_CALIBRATION_ROUNDS)
+        rounds = choose_bcrypt_rounds(base_ms, BCRYPT_CALIBRATION_ROUNDS, PASSWORD_HASH_BUDGET_MS)
+        _policy.update({"base_rounds": BCRYPT_CALIBRATION_ROUNDS, "base_ms": round(base_ms, 2), "calibrated": True})
+    apply_hash_policy(rounds)
+    return dict(_policy)
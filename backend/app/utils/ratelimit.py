@@ -0,0 +1,139 @@
+import ipaddress
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+# Ограничение частоты попыток входа алгоритмом token bucket.
+# Проверка выполняется до поиска пользователя и bcrypt, поэтому серия
+# подборов паролей отсекается дешевым ответом 429, не занимая процессор.
+# Состояние хранится в памяти процесса и ограничено по числу ключей (LRU).
+
+_registry: List["TokenBucketLimiter"] = []
+
+class TokenBucketLimiter:
+    """
+    Корзина на каждый ключ: вмещает capacity попыток и пополняется
+    со скоростью rate попыток в секунду. Давно не использованные
+    корзины вытесняются при переполнении.
+    """
+
+    def __init__(self, name: str, capacity: float, rate: float, maxsize: int = 10000):
+        self.name = name
+        self.capacity = capacity
+        self.rate = rate
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+        _registry.append(self)
+
+    def acquire(self, key: Hashable) -> float:
+        """
+        Расходует одну попытку. Возвращает 0, если попытка разрешена,
+        иначе — сколько секунд ждать до следующей
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [self.capacity, now]
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            tokens, updated_at = bucket
+            bucket[0] = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.allowed += 1
+            return 0.0
+
+        self.rejected += 1
+        return (1 - bucket[0]) / self.rate
+
+    def reset(self, key: Hashable) -> None:
+        self._buckets.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "size": len(self._buckets),
+            "maxsize": self.maxsize,
+            "capacity": self.capacity,
+            "rate_per_minute": self.rate * 60,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+        }
+
+def limiter_stats() -> List[Dict[str, Any]]:
+    """
+    Состояние всех ограничителей (для /debug/rate-limits)
+    """
+    return [limiter.stats() for limiter in _registry]
+
+# Прокси перед приложением, которым разрешено сообщать адрес клиента
+# в X-Forwarded-For: адреса и подсети через запятую. "*" — прокси считается
+# любой непосредственный собеседник (Render: адрес балансировщика не
+# фиксирован, а напрямую приложение недоступно). Пусто — заголовок
+# игнорируется и используется адрес соединения.
+TRUSTED_PROXIES = [item.strip() for item in os.environ.get("TRUSTED_PROXIES", "").split(",") if item.strip()]
+_trust_any_peer = "*" in TRUSTED_PROXIES
+_trusted_networks = [ipaddress.ip_network(item, strict=False) for item in TRUSTED_PROXIES if item != "*"]
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_networks)
+
+def get_client_ip(request) -> Optional[str]:
+    """
+    Адрес клиента для ограничителей. Если соединение пришло от доверенного
+    прокси, X-Forwarded-For разбирается справа налево до первого адреса,
+    не принадлежащего доверенным прокси: значения левее мог подставить сам клиент.
+    """
+    peer = request.client.host if request.client else None
+    if peer is None or not (_trust_any_peer or _is_trusted_proxy(peer)):
+        return peer
+    forwarded = [
+        item.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for item in header.split(",")
+        if item.strip()
+    ]
+    for address in reversed(forwarded):
+        if not _is_trusted_proxy(address):
+            return address
+    return forwarded[0] if forwarded else peer
+
+# Попытки входа с одного IP-адреса и для одного аккаунта
+login_ip_limiter = TokenBucketLimiter(
+    "login_ip",
+    capacity=float(os.environ.get("LOGIN_IP_BURST", "20")),
+    rate=float(os.environ.get("LOGIN_IP_PER_MINUTE", "10")) / 60,
+    maxsize=int(os.environ.get("LOGIN_LIMITER_SIZE", "10000")),
+)
+login_account_limiter = TokenBucketLimiter(
+    "login_account",
+    capacity=float(os.environ.get("LOGIN_ACCOUNT_BURST", "5")),
+    rate=float(os.environ.get("LOGIN_ACCOUNT_PER_MINUTE", "5")) / 60,
+    maxsize=int(os.environ.get("LOGIN_LIMITER_SIZE", "10000")),
+)
+
+def check_login_attempt(ip: Optional[str], email: Optional[str]) -> float:
+    """
+    Проверяет попытку входа по IP-адресу и по аккаунту.
+    Возвращает 0, если попытка разрешена, иначе — секунды до следующей.
+    Попытка с заблокированного IP не расходует лимит аккаунта.
+    """
+    retry_after = login_ip_limiter.acquire(ip or "unknown")
+    if retry_after:
+        return retry_after
+    return login_account_limiter.acquire((email or "").strip().lower())
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import math
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from models.models import RevokedToken
+from utils.log import get_logger
+
+# Черный список отозванных токенов по jti.
+# Источник истины — таблица revoked_tokens; в памяти процесса хранится ее копия
+# (jti -> exp), а перед ней стоит фильтр Блума: для неотозванного токена
+# (почти все запросы) проверка сводится к k битам без обращения к словарю.
+# Записи живут до истечения срока действия токена, дальше токен
+# отклоняется и без черного списка.
+# Каждый воркер держит свою копию, поэтому записи других воркеров
+# подгружаются из таблицы раз в REVOCATION_SYNC_INTERVAL секунд.
+# Ротация refresh-токена от этой задержки не зависит: отзыв — это INSERT
+# по первичному ключу jti, и повторное использование токена отклоняется
+# таблицей сразу.
+
+logger = get_logger(__name__)
+
+REVOCATION_SYNC_INTERVAL = float(os.environ.get("REVOCATION_SYNC_INTERVAL", "15"))
+
+class BloomFilter:
+    """
+    Фильтр Блума на bytearray; позиции вычисляются двойным хешированием
+    одного blake2b-дайджеста
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class TokenDenylist:
+    """
+    Отозванные jti с временем истечения. Просроченные записи удаляются
+    не чаще раза в purge_interval секунд, фильтр при этом пересобирается.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01, purge_interval: float = 600):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.purge_interval = purge_interval
+        self._revoked: Dict[str, float] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._next_purge = time.time() + purge_interval
+        self.checks = 0
+        self.bloom_negatives = 0
+        self.false_positives = 0
+        self.rejected = 0
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self._revoked[jti] = expires_at
+        self._bloom.add(jti)
+        if time.time() >= self._next_purge:
+            self.purge()
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if jti is None:
+            return False
+        self.checks += 1
+        if jti not in self._bloom:
+            self.bloom_negatives += 1
+            return False
+        expires_at = self._revoked.get(jti)
+        if expires_at is None or expires_at <= time.time():
+            self.false_positives += 1
+            return False
+        self.rejected += 1
+        return True
+
+    def check(self, token_hash: bytes, claims: dict) -> bool:
+        """
+        Проверка для utils.auth.register_revocation_check
+        """
+        return self.is_revoked(claims.get("jti"))
+
+    def purge(self) -> None:
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        # Фильтр пересобирается с запасом, если черный список вырос
+        self._bloom = BloomFilter(max(self.capacity, 2 * len(self._revoked)), self.error_rate)
+        for jti in self._revoked:
+            self._bloom.add(jti)
+        self._next_purge = now + self.purge_interval
+
+    def load(self, rows: Iterable[Tuple[str, float]]) -> None:
+        self._revoked = dict(rows)
+        self.purge()
+
+    def merge(self, rows: Iterable[Tuple[str, float]]) -> int:
+        """
+        Добавляет отсутствующие записи; возвращает их число
+        """
+        added = 0
+        for jti, expires_at in rows:
+            if jti not in self._revoked:
+                self.add(jti, expires_at)
+                added += 1
+        return added
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._revoked),
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hashes,
+            "checks": self.checks,
+            "bloom_negatives": self.bloom_negatives,
+            "false_positives": self.false_positives,
+            "rejected": self.rejected,
+        }
+
+denylist = TokenDenylist(
+    capacity=int(os.environ.get("REVOCATION_CAPACITY", "100000")),
+    error_rate=float(os.environ.get("REVOCATION_ERROR_RATE", "0.01")),
+)
+
+def _timestamp(value: datetime) -> float:
+    # В базе хранится наивное UTC-время
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+async def load_revoked_tokens(conn: AsyncConnection) -> int:
+    """
+    Удаляет из таблицы просроченные записи и загружает остальные
+    в черный список; вызывается при старте приложения
+    """
+    now = datetime.utcnow()
+    await conn.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+    result = await conn.execute(select(RevokedToken.jti, RevokedToken.expires_at))
+    denylist.load(
+        (jti, _timestamp(expires_at)) for jti, expires_at in result.all()
+    )
+    return len(denylist)
+
+async def sync_revoked_tokens(engine: AsyncEngine) -> int:
+    """
+    Добавляет в черный список отзывы, записанные другими воркерами.
+    Возвращает число новых записей.
+    """
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at)
+            .where(RevokedToken.expires_at > datetime.utcnow())
+        )
+        return denylist.merge(
+            (jti, _timestamp(expires_at)) for jti, expires_at in result.all()
+        )
+
+async def sync_revoked_periodically(engine: AsyncEngine, interval: float = REVOCATION_SYNC_INTERVAL) -> None:
+    """
+    Фоновая синхронизация черного списка; запускается задачей при старте приложения
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sync_revoked_tokens(engine)
+        except Exception:
+            logger.exception("Revoked tokens sync failed")
+
+async def revoke_claims(db: AsyncSession, claims: Optional[dict]) -> bool:
+    """
+    Отзывает токен по его claims: запись в revoked_tokens и в черный список.
+    Возвращает True, если токен отозван этим вызовом, и False, если он уже
+    был отозван (в том числе другим воркером или параллельным запросом)
+    или не может быть отозван: у токенов, выпущенных до появления отзыва,
+    нет jti.
+    """
+    if not claims or claims.get("jti") is None or claims.get("exp") is None:
+        return False
+
+    jti = claims["jti"]
+    if denylist.is_revoked(jti):
+        return False
+
+    db.add(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(claims["exp"])))
+    try:
+        await db.commit()
+        revoked = True
+    except IntegrityError:
+        # jti уже в таблице: токен отозван раньше
+        await db.rollback()
+        revoked = False
+    denylist.add(jti, claims["exp"])
+    return revoked
@@ -0,0 +1,195 @@
+import heapq
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Учет SQL-запросов по HTTP-запросам.
+# События движка (before/after_cursor_execute) записывают каждый запрос
+# в статистику текущего HTTP-запроса (ContextVar, ее создает middleware):
+# число запросов, время в базе и «отпечатки» — текст запроса без литералов.
+# Отпечаток, повторившийся в одном HTTP-запросе N_PLUS_ONE_THRESHOLD раз
+# и более, считается признаком N+1. Итоги по маршрутам копятся в perf_registry
+# и отдаются эндпоинтом /debug/perf.
+
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+SLOWEST_PER_ROUTE = int(os.environ.get("SQL_SLOWEST_PER_ROUTE", "5"))
+MAX_ROUTES = int(os.environ.get("SQL_PERF_MAX_ROUTES", "500"))
+
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\(\s*\?(\s*,\s*\?)+\s*\)")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+")
+_SPACES = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Текст запроса без литералов и с одинаковыми плейсхолдерами:
+    запросы, отличающиеся только значениями, дают один отпечаток
+    """
+    statement = _STRING.sub("?", statement)
+    statement = _PARAM.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("(...)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+class RequestSQLStats:
+    """
+    SQL-статистика одного HTTP-запроса
+    """
+    __slots__ = ("queries", "db_time", "fingerprints", "slowest")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.fingerprints: Counter = Counter()
+        self.slowest: List[tuple] = []
+
+    def record(self, statement: str, duration: float) -> None:
+        self.queries += 1
+        self.db_time += duration
+        key = fingerprint(statement)
+        self.fingerprints[key] += 1
+        item = (duration, key)
+        if len(self.slowest) < SLOWEST_PER_ROUTE:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        return {key: count for key, count in self.fingerprints.items() if count >= threshold}
+
+request_sql_stats: ContextVar[Optional[RequestSQLStats]] = ContextVar("request_sql_stats", default=None)
+
+def start_sql_stats() -> RequestSQLStats:
+    stats = RequestSQLStats()
+    request_sql_stats.set(stats)
+    return stats
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Подключает учет запросов к движку; вне HTTP-запроса (фоновые задачи,
+    старт приложения) запросы не учитываются
+    """
+    # Запросы в одном соединении не вложены, поэтому время начала хранится
+    # в одном слоте: если запрос завершился ошибкой и after_cursor_execute
+    # не вызван, значение просто перезапишет следующий запрос
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started_at"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started_at = conn.info.pop("query_started_at", None)
+        stats = request_sql_stats.get()
+        if stats is not None and started_at is not None:
+            stats.record(statement, time.perf_counter() - started_at)
+
+class RouteStats:
+    __slots__ = ("requests", "queries", "db_time", "max_queries", "n_plus_one", "slowest")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.max_queries = 0
+        self.n_plus_one: Dict[str, int] = {}
+        self.slowest: List[tuple] = []
+
+class PerfRegistry:
+    """
+    Итоги по маршрутам; число маршрутов ограничено, давно не вызывавшиеся
+    вытесняются
+    """
+
+    def __init__(self, max_routes: int = MAX_ROUTES):
+        self.max_routes = max_routes
+        self._routes: "OrderedDict[str, RouteStats]" = OrderedDict()
+
+    def add(self, route: str, stats: RequestSQLStats) -> None:
+        route_stats = self._routes.get(route)
+        if route_stats is None:
+            route_stats = RouteStats()
+            self._routes[route] = route_stats
+            if len(self._routes) > self.max_routes:
+                self._routes.popitem(last=False)
+        else:
+            self._routes.move_to_end(route)
+
+        route_stats.requests += 1
+        route_stats.queries += stats.queries
+        route_stats.db_time += stats.db_time
+        route_stats.max_queries = max(route_stats.max_queries, stats.queries)
+        for key, count in stats.repeated().items():
+            route_stats.n_plus_one[key] = max(route_stats.n_plus_one.get(key, 0), count)
+        for item in stats.slowest:
+            if len(route_stats.slowest) < SLOWEST_PER_ROUTE:
+                heapq.heappush(route_stats.slowest, item)
+            elif item > route_stats.slowest[0]:
+                heapq.heapreplace(route_stats.slowest, item)
+
+    def clear(self) -> None:
+        self._routes.clear()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Маршруты по убыванию суммарного времени в базе
+        """
+        routes = []
+        for route, stats in self._routes.items():
+            routes.append({
+                "route": route,
+                "requests": stats.requests,
+                "avg_queries": round(stats.queries / stats.requests, 2),
+                "max_queries": stats.max_queries,
+                "avg_db_ms": round(stats.db_time * 1000 / stats.requests, 3),
+                "total_db_ms": round(stats.db_time * 1000, 3),
+                "n_plus_one": [
+                    {"statement": key, "max_repeats": count}
+                    for key, count in sorted(stats.n_plus_one.items(), key=lambda item: -item[1])
+                ],
+                "slowest": [
+                    {"statement": key, "ms": round(duration * 1000, 3)}
+                    for duration, key in sorted(stats.slowest, reverse=True)
+                ],
+            })
+        routes.sort(key=lambda item: -item["total_db_ms"])
+        return routes
+
+perf_registry = PerfRegistry()
+
+def route_name(scope: dict) -> str:
+    """
+    Шаблон маршрута (/api/events/{event_id}), а не фактический путь,
+    чтобы запросы к разным объектам попадали в одну группу
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    path = scope.get("path", "")
+    if path_format is None:
+        endpoint = scope.get("endpoint")
+        return f"{scope.get('method', '')} {getattr(endpoint, '__name__', None) or path}"
+
+    # В зависимости от версии FastAPI путь маршрута вложенного роутера хранится
+    # с префиксом или без; префикс восстанавливаем по фактическому пути
+    try:
+        rendered = path_format.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        rendered = path_format
+    prefix = path[:-len(rendered)] if rendered and path.endswith(rendered) else ""
+    return f"{scope.get('method', '')} {prefix}{path_format}"
+
+def server_timing(stats: RequestSQLStats, total: float) -> str:
+    """
+    Значение заголовка Server-Timing: время в базе с числом запросов и общее время
+    """
+    return (
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+        f"total;dur={total * 1000:.2f}"
+    )
@@ -0,0 +1,53 @@
+from typing import Awaitable, Callable, List, Optional
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import ReadSessionLocal
+from services.event_serializer import dumps
+
+# Потоковая выгрузка больших списков в формате NDJSON (одна JSON-строка на объект).
+# Строки читаются из базы порциями через stream_scalars/yield_per, и каждая
+# порция отправляется клиенту сразу после сериализации, поэтому память и время
+# до первого байта не зависят от количества найденных записей.
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_SIZE = 500
+
+def wants_ndjson(request: Optional[Request], stream: bool = False) -> bool:
+    """
+    Клиент запросил потоковый режим параметром ?stream=1
+    или заголовком Accept: application/x-ndjson
+    """
+    if stream:
+        return True
+    if request is None:
+        return False
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def ndjson_response(
+    query,
+    serialize_batch: Callable[[AsyncSession, list], Awaitable[List[dict]]],
+    chunk_size: int = STREAM_CHUNK_SIZE
+) -> StreamingResponse:
+    """
+    Возвращает StreamingResponse, который выполняет query порциями
+    по chunk_size строк и пишет результат serialize_batch построчно.
+
+    Генератор открывает собственную сессию: сессия из get_db закрывается
+    раньше, чем начинается отправка тела ответа.
+    """
+    async def generate():
+        async with ReadSessionLocal() as session:
+            result = await session.stream_scalars(
+                query.execution_options(yield_per=chunk_size)
+            )
+            async for partition in result.partitions():
+                items = await serialize_batch(session, partition)
+                yield b"".join(dumps(item) + b"\n" for item in items)
+                # Отпускаем уже отправленные объекты из identity map.
+                # expunge_all() нельзя: он заменяет identity map, которую
+                # еще использует потоковый результат для следующих порций
+                for item in partition:
+                    session.expunge(item)
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
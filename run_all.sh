@@ -1,2 +1,5 @@
 #!/bin/bash
+# На Render приложение доступно только через балансировщик: адрес клиента
+# для ограничения попыток входа берется из X-Forwarded-For (utils/ratelimit.py)
+export TRUSTED_PROXIES="${TRUSTED_PROXIES-*}"
 cd backend/app && python3 -m uvicorn main:app --host 0.0.0.0 --port $PORT
\ No newline at end of file